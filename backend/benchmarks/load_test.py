@@ -0,0 +1,283 @@
+"""
+Asyncio load generator driving the backend with simulated users. Each user logs in, streams
+synthetic hand landmark frames to /predict, saves the signed text with /account/add-prediction
+and checks /account/info, then starts another session. Runs in-process through ASGI by default,
+or against a running server with --url. Prints throughput and p50/p95/p99 latency per endpoint
+as JSON, so runs can be compared across commits.
+
+In-process runs register their users in a temporary SQLite database, which is removed afterwards.
+
+Usage: python -m backend.benchmarks.load_test [--concurrency 16] [--duration 30] [--url URL]
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+# Offsets of the four joints of each finger from the wrist, in a hand about 0.2 image widths tall.
+FINGER_DIRECTIONS = np.array([[-0.6, -0.5], [-0.25, -1.0], [0.0, -1.0], [0.2, -0.95], [0.4, -0.8]])
+JOINT_DISTANCES = np.array([0.3, 0.55, 0.75, 0.9])
+
+# Per-frame landmark jitter and the chance of switching to a new sign on each frame.
+FRAME_JITTER = 0.002
+POSE_CHANGE_PROBABILITY = 0.05
+
+# Delay before retrying a failed login, doubled after each consecutive failure, and the number
+# of consecutive failures after which a simulated user stops.
+LOGIN_RETRY_SECONDS = 0.1
+MAX_LOGIN_FAILURES = 5
+
+
+class HandSimulator:
+    """
+    Generate the 63 landmark values of a hand holding a sign with small tremors between frames,
+    occasionally moving to a different sign, like a MediaPipe hand tracked from a webcam.
+    """
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        self.pose = self._random_pose()
+
+    def _random_pose(self) -> np.ndarray:
+        """
+        Get a random hand pose as (21, 3) normalized image coordinates.
+        """
+        scale = self.rng.uniform(0.15, 0.3)
+        angle = self.rng.uniform(-0.4, 0.4)
+        rotation = np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+        wrist = np.array([self.rng.uniform(0.3, 0.7), self.rng.uniform(0.6, 0.85)])
+
+        # Each finger is bent by its own amount, which is what tells the signs apart.
+        curls = self.rng.uniform(0.2, 1.0, size=(5, 1))
+        joints = FINGER_DIRECTIONS[:, None, :] * JOINT_DISTANCES[None, :, None] * curls[:, :, None]
+        points = np.vstack([np.zeros((1, 2)), joints.reshape(-1, 2)]) @ rotation.T * scale + wrist
+
+        depth = np.concatenate([[0.0], self.rng.normal(0, 0.02, 20)])
+        return np.column_stack([points, depth])
+
+    def next_frame(self) -> list[float]:
+        """
+        Get the landmarks of the next frame.
+        """
+        if self.rng.random() < POSE_CHANGE_PROBABILITY:
+            self.pose = self._random_pose()
+        frame = self.pose + self.rng.normal(0, FRAME_JITTER, size=self.pose.shape)
+        return frame.astype(np.float32).ravel().tolist()
+
+
+class LatencyRecorder:
+    """
+    Latencies and error counts of every request, grouped by endpoint.
+    """
+    def __init__(self):
+        self.latencies_ns: dict[str, list[int]] = {}
+        self.errors: dict[str, int] = {}
+
+    async def request(self, client: httpx.AsyncClient, endpoint: str, method: str, url: str,
+                      **kwargs) -> httpx.Response | None:
+        """
+        Send a request and record its latency, or an error for failures and non-2xx responses.
+        """
+        start = time.perf_counter_ns()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+            return None
+        self.latencies_ns.setdefault(endpoint, []).append(time.perf_counter_ns() - start)
+        if not response.is_success:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        return response
+
+    def summary(self, elapsed_seconds: float) -> dict:
+        """
+        Get the request count, throughput and latency percentiles in milliseconds of each endpoint.
+        """
+        endpoints = {}
+        all_latencies = []
+        for endpoint in sorted(set(self.latencies_ns) | set(self.errors)):
+            latencies = np.array(self.latencies_ns.get(endpoint, []), dtype=np.float64) / 1_000_000
+            all_latencies.append(latencies)
+            endpoints[endpoint] = summarize(latencies, self.errors.get(endpoint, 0), elapsed_seconds)
+
+        total = np.concatenate(all_latencies) if all_latencies else np.array([])
+        return {
+            "total": summarize(total, sum(self.errors.values()), elapsed_seconds),
+            "endpoints": endpoints,
+        }
+
+
+def summarize(latencies_ms: np.ndarray, errors: int, elapsed_seconds: float) -> dict:
+    """
+    Get the request count, throughput and latency percentiles of a set of requests.
+    """
+    summary = {
+        "requests": int(len(latencies_ms)),
+        "errors": errors,
+        "throughput_rps": len(latencies_ms) / elapsed_seconds if elapsed_seconds > 0 else 0.0,
+    }
+    if len(latencies_ms):
+        p50, p95, p99 = np.percentile(latencies_ms, [50, 95, 99])
+        summary.update({
+            "mean_ms": float(latencies_ms.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(latencies_ms.max()),
+        })
+    return summary
+
+
+async def register_user(client: httpx.AsyncClient, prefix: str, run_id: str, index: int) -> dict:
+    """
+    Register a user for a simulated session and return its credentials.
+    """
+    credentials = {
+        "username": f"load_{run_id}_{index}",
+        "email": f"load_{run_id}_{index}@example.com",
+        "password": f"password-{run_id}",
+    }
+    response = await client.post(f"{prefix}/auth/register", json=credentials)
+    response.raise_for_status()
+    return credentials
+
+
+async def simulate_user(client: httpx.AsyncClient, recorder: LatencyRecorder, prefix: str, credentials: dict,
+                        rng: np.random.Generator, frames_per_session: int, deadline: float):
+    """
+    Run user sessions until the deadline: log in, predict a stream of frames, save the
+    confidently predicted letters and fetch the account info. Failed logins are retried with a
+    growing delay, and the user stops after MAX_LOGIN_FAILURES of them in a row.
+    """
+    hand = HandSimulator(rng)
+    login_failures = 0
+    while time.monotonic() < deadline:
+        response = await recorder.request(client, "login", "POST", f"{prefix}/auth/login",
+                                          data={"username": credentials["username"],
+                                                "password": credentials["password"]})
+        if response is None or not response.is_success:
+            login_failures += 1
+            if login_failures >= MAX_LOGIN_FAILURES:
+                return
+            await asyncio.sleep(min(LOGIN_RETRY_SECONDS * 2 ** (login_failures - 1),
+                                    max(0.0, deadline - time.monotonic())))
+            continue
+        login_failures = 0
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        letters = []
+        for _ in range(frames_per_session):
+            if time.monotonic() >= deadline:
+                return
+            response = await recorder.request(client, "predict", "POST", f"{prefix}/predict",
+                                              json={"landmarks": hand.next_frame()}, headers=headers)
+            if response is not None and response.is_success and response.json()["confidence"] >= 0.8:
+                letters.append(response.json()["prediction"])
+
+        await recorder.request(client, "add-prediction", "POST", f"{prefix}/account/add-prediction",
+                               json={"prediction_string": "".join(letters[-32:]) or "-"}, headers=headers)
+        await recorder.request(client, "info", "GET", f"{prefix}/account/info", headers=headers)
+
+
+def git_commit() -> str | None:
+    """
+    Get the commit being benchmarked, if running from a git checkout.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+@contextlib.asynccontextmanager
+async def open_client(url: str | None):
+    """
+    Open a client for a running server, or for the app in this process with its startup run,
+    using a temporary database.
+    """
+    if url is not None:
+        async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+            yield client
+        return
+
+    if "backend.database.database" in sys.modules:
+        raise RuntimeError("The database engine was created before the temporary database was configured")
+
+    from backend.configs.config import get_config
+
+    with tempfile.TemporaryDirectory() as database_dir:
+        # The engine is created from the configured URL when the app is imported, so set it first.
+        # Only the in-memory config is changed, config.ini keeps the real database.
+        get_config().set("DATABASE", "url", f"sqlite+aiosqlite:///{os.path.join(database_dir, 'load_test.db')}")
+
+        from backend.main import app
+        from backend.routers import predict
+
+        async with app.router.lifespan_context(app):
+            # Wait for the model to be loaded and warmed up, as a load balancer would.
+            while not predict.registry.ready:
+                if predict.registry.last_error is not None:
+                    raise RuntimeError(f"Model failed to load: {predict.registry.last_error}")
+                await asyncio.sleep(0.05)
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark",
+                                         timeout=30) as client:
+                yield client
+
+
+async def run(concurrency: int, duration: float, frames_per_session: int, url: str | None,
+              prefix: str, seed: int) -> dict:
+    """
+    Register the users, run the simulated sessions for the duration and summarize the results.
+    """
+    run_id = uuid.uuid4().hex[:8]
+    async with open_client(url) as client:
+        users = await asyncio.gather(*(register_user(client, prefix, run_id, index) for index in range(concurrency)))
+
+        recorder = LatencyRecorder()
+        start = time.monotonic()
+        await asyncio.gather(*(simulate_user(client, recorder, prefix, credentials, np.random.default_rng(seed + index),
+                                             frames_per_session, start + duration)
+                               for index, credentials in enumerate(users)))
+        elapsed = time.monotonic() - start
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "target": url or "in-process",
+        "concurrency": concurrency,
+        "duration_seconds": elapsed,
+        "frames_per_session": frames_per_session,
+        **recorder.summary(elapsed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="number of simulated users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run for")
+    parser.add_argument("--frames-per-session", type=int, default=60, help="predictions per login session")
+    parser.add_argument("--url", default=None, help="server to benchmark, e.g. http://localhost:8000")
+    parser.add_argument("--prefix", default="/api", help="path the API routes are served under")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the results to a JSON file as well")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.concurrency, args.duration, args.frames_per_session, args.url,
+                              args.prefix, args.seed))
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    sys.stdout.write(report + "\n")
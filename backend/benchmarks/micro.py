@@ -0,0 +1,189 @@
+"""
+Micro-benchmarks of the predict hot paths on CPU with real torch and NumPy: landmark
+normalization, request validation, binary decoding, tensor construction, the model forward
+pass at several batch sizes and response serialization. Results are compared against a
+stored baseline and any benchmark slower than the baseline by more than the threshold is
+reported as a regression, with a non-zero exit code.
+
+Baselines are only comparable on the same machine and library versions, so none is committed.
+Record one with --save-baseline on the machine that runs the comparison, e.g. in the Docker image
+built from docker/requirements.txt, and record it again after changing the machine or libraries.
+
+Usage: python -m backend.benchmarks.micro [--filter NAME] [--threshold 0.1] [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Callable
+
+import numpy as np
+
+from backend.inference.engines import MODEL_DIR, load_engine, torch_model_file
+from backend.utils.preprocessing import normalize_landmarks, normalize_landmarks_batch
+from backend.utils.wire_format import decode_landmark_frames
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Batch sizes the forward passes are measured at.
+BATCH_SIZES = (1, 8, 64, 256)
+
+# Each repeat runs for at least this long, and the median of the repeats is reported.
+MIN_REPEAT_SECONDS = 0.05
+REPEATS = 7
+
+
+def measure(fn: Callable[[], object], min_seconds: float = MIN_REPEAT_SECONDS, repeats: int = REPEATS) -> dict:
+    """
+    Time a function, calibrating the number of calls per repeat so each repeat runs for at
+    least min_seconds. Returns the median and minimum time per call in nanoseconds.
+    """
+    fn()
+    calls = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter_ns() - start
+        if elapsed >= min_seconds * 1e9:
+            break
+        calls *= 2
+
+    per_call = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for _ in range(calls):
+            fn()
+        per_call.append((time.perf_counter_ns() - start) / calls)
+
+    return {"median_ns": float(np.median(per_call)), "min_ns": float(np.min(per_call)), "calls": calls}
+
+
+def build_benchmarks() -> dict[str, Callable[[], object]]:
+    """
+    Create every benchmark, keyed by name.
+    """
+    import torch
+
+    from backend.routers.predict import LandmarkInput, PredictionResult
+
+    rng = np.random.default_rng(0)
+    rows = {size: rng.uniform(0, 1, size=(size, 63)).astype(np.float32) for size in BATCH_SIZES}
+    row = rows[1][0]
+    body = json.dumps({"landmarks": row.tolist()})
+    payload = row.astype("<f4").tobytes()
+    result = PredictionResult(prediction="A", confidence=0.93, accuracy=1, probabilities=[],
+                              inferenceTimeMs=1.234, modelVersion="0123456789ab")
+
+    benchmarks = {
+        "normalize_landmarks": lambda: normalize_landmarks(row.copy()),
+        "normalize_landmarks_batch_1": lambda: normalize_landmarks_batch(rows[1]),
+        "normalize_landmarks_batch_64": lambda: normalize_landmarks_batch(rows[64]),
+        "landmark_input_validate_json": lambda: LandmarkInput.model_validate_json(body),
+        "decode_landmark_frames": lambda: decode_landmark_frames(payload, 63, max_frames=1),
+        "tensor_from_list": lambda: torch.tensor([row.tolist()]),
+        "tensor_from_numpy": lambda: torch.from_numpy(rows[1]).to(torch.float32),
+        "prediction_result_dump_json": lambda: result.model_dump_json(),
+    }
+
+    # The TorchScript model as exported, without torch.compile, so results do not depend on
+    # the compiler being available.
+    model = torch.jit.load(os.path.join(MODEL_DIR, torch_model_file("float32")))
+    model.eval()
+
+    def torch_forward(batch: torch.Tensor):
+        with torch.no_grad():
+            return model(batch)
+
+    numpy_engine = load_engine("numpy", "float32")
+    for size in BATCH_SIZES:
+        tensor = torch.from_numpy(rows[size])
+        benchmarks[f"torchscript_forward_{size}"] = lambda tensor=tensor: torch_forward(tensor)
+        benchmarks[f"numpy_forward_{size}"] = lambda batch=rows[size]: numpy_engine.predict_proba(batch)
+
+    return benchmarks
+
+
+def environment() -> dict:
+    """
+    Describe the machine and library versions the results were measured with.
+    """
+    import torch
+
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """
+    Get the benchmarks whose median time grew by more than the threshold over the baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None:
+            continue
+        change = result["median_ns"] / reference["median_ns"] - 1
+        result["change"] = change
+        if change > threshold:
+            regressions.append({"name": name, "baseline_ns": reference["median_ns"],
+                                "median_ns": result["median_ns"], "change": change})
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slowdown, 0.1 is 10%%")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--output", default=None, help="write the results to a JSON file")
+    args = parser.parse_args()
+
+    benchmarks = build_benchmarks()
+    results = {}
+    for name, fn in benchmarks.items():
+        if args.filter and args.filter not in name:
+            continue
+        results[name] = measure(fn)
+        print(f"{name:<32} {results[name]['median_ns'] / 1000:10.2f} us", file=sys.stderr)
+
+    report = {"environment": environment(), "results": results}
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        regressions = []
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get("environment") != report["environment"]:
+            print("Warning: the baseline was recorded in a different environment", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        report["threshold"] = args.threshold
+        report["regressions"] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['name']}: {regression['baseline_ns'] / 1000:.2f} us -> "
+                  f"{regression['median_ns'] / 1000:.2f} us (+{regression['change']:.0%})", file=sys.stderr)
+    else:
+        print(f"No baseline at {args.baseline}, run with --save-baseline to record one", file=sys.stderr)
+        regressions = []
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
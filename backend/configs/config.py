@@ -9,37 +9,99 @@ from secrets import token_hex
 config = configparser.ConfigParser()
 
 
-def initialize_config():
+def default_config() -> dict:
     """
-    Initialize default config data if file does not exist or load data from file.
+    Get the default values for every config section.
     """
-    if not os.path.exists('config.ini'):
-        config['HOST'] = {
+    return {
+        'HOST': {
             'scheme': 'http',
             'host': 'localhost',
             'port': '8000',
             'path': '/api'
-        }
-
-        config['AUTH'] = {
+        },
+        'AUTH': {
             "secret_access": token_hex(32),
             "secret_refresh": token_hex(32),
             "algorithm": "HS256",
             "access_token_expire_minutes": 15,
-            "refresh_token_expire_days": 30
-        }
-
-        config['CORS'] = {
+            "refresh_token_expire_days": 30,
+            "admin_token": token_hex(32)
+        },
+        'CORS': {
             'allow_origins': ['http://localhost:5173'],
             'allow_credentials': True,
             'allow_methods': ['*'],
             'allow_headers': ['*']
+        },
+        'INFERENCE': {
+            'backend': 'torch',
+            'precision': 'float32',
+            'max_batch_size': 64,
+            'max_wait_us': 2000,
+            'max_queue_size': 1024,
+            'max_sequence_length': 256,
+            'executor': 'thread',
+            'executor_workers': 1,
+            'executor_queue_size': 64,
+            'retry_after_seconds': 1,
+            'warm_up_iterations': 3,
+            'model_versions_dir': os.path.join('backend', 'model', 'versions'),
+            'model_watch_seconds': 0,
+            'cache_size': 0,
+            'cache_grid': 0.01,
+            'session_max_count': 0,
+            'session_ttl_seconds': 300,
+            'session_delta_threshold': 0.02,
+            'session_smoothing_alpha': 0.5
+        },
+        'SERVER': {
+            'bind_host': '0.0.0.0',
+            'workers': 2,
+            'torch_threads': 0,
+            'torch_interop_threads': 1,
+            'backlog': 2048,
+            'memory_report_seconds': 300
+        },
+        'DATABASE': {
+            'url': 'sqlite+aiosqlite:///database.db',
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'sqlite_journal_mode': 'wal',
+            'sqlite_synchronous': 'normal',
+            'sqlite_busy_timeout_ms': 5000,
+            'sqlite_mmap_size': 268435456,
+            'predict_count_flush_seconds': 1
+        },
+        'ACCOUNT': {
+            'history_page_size': 10,
+            'history_max_page_size': 100,
+            'history_max_batch_size': 100
         }
+    }
 
+
+def initialize_config():
+    """
+    Initialize default config data if file does not exist or load data from file.
+    Any sections or options missing from an existing file are filled in with defaults.
+    """
+    if os.path.exists('config.ini'):
+        config.read('config.ini')
+
+    updated = False
+    for section, options in default_config().items():
+        if not config.has_section(section):
+            config.add_section(section)
+        for option, value in options.items():
+            if not config.has_option(section, option):
+                config.set(section, option, str(value))
+                updated = True
+
+    if updated:
         with open('config.ini', 'w') as configfile:
             config.write(configfile)
-    else:
-        config.read('config.ini')
 
 
 def get_config():
@@ -1,9 +1,29 @@
 """
-Create models for database and then generate local databse file.
+Create models for database and the async engine for the local database file.
 """
 from datetime import datetime
 
-from sqlmodel import SQLModel, create_engine, Field
+from sqlalchemy import Index, event
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import SQLModel, Field
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.configs.config import get_config
+
+# Database URL and connection pool settings pulled from config.
+DATABASE_URL = get_config().get("DATABASE", "url")
+POOL_SIZE = int(get_config().get("DATABASE", "pool_size"))
+MAX_OVERFLOW = int(get_config().get("DATABASE", "max_overflow"))
+POOL_TIMEOUT = float(get_config().get("DATABASE", "pool_timeout"))
+
+# SQLite settings applied to every new connection, ignored for other databases.
+SQLITE_JOURNAL_MODE = get_config().get("DATABASE", "sqlite_journal_mode")
+SQLITE_SYNCHRONOUS = get_config().get("DATABASE", "sqlite_synchronous")
+SQLITE_BUSY_TIMEOUT_MS = int(get_config().get("DATABASE", "sqlite_busy_timeout_ms"))
+SQLITE_MMAP_SIZE = int(get_config().get("DATABASE", "sqlite_mmap_size"))
+
+SQLITE_JOURNAL_MODES = ("delete", "truncate", "persist", "memory", "wal", "off")
+SQLITE_SYNCHRONOUS_LEVELS = ("off", "normal", "full", "extra")
 
 
 class User(SQLModel, table=True):
@@ -11,10 +31,11 @@ class User(SQLModel, table=True):
     SQLModel representing a user in the database.
     """
     id: int | None = Field(default=None, primary_key=True)
-    username: str = Field(..., max_length=50)
-    email: str = Field(..., max_length=50)
+    username: str = Field(..., max_length=50, unique=True, index=True)
+    email: str = Field(..., max_length=50, unique=True, index=True)
     password_hashed: str = Field(..., max_length=50)
     total_predictions: int = Field(default=0)
+    history_count: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     is_active: bool = Field(default=True)
     created_at: datetime = Field(default=None)
     last_login: datetime = Field(default=None)
@@ -28,8 +49,78 @@ class PredictionHistory(SQLModel, table=True):
     user_id: int | None = Field(default=None, foreign_key="user.id")
     content: str = Field(..., max_length=1000)
     created_at: datetime = Field(default=None, index=True)
+    client_id: str | None = Field(default=None, max_length=64)
+
+
+# Serves a user's history newest first, including pages that start after a cursor.
+Index("ix_predictionhistory_user_id_created_at", PredictionHistory.user_id,
+      PredictionHistory.created_at.desc(), PredictionHistory.id.desc())
+
+# Makes saving entries idempotent, a retried upload cannot add an entry with the same client id twice.
+Index("ix_predictionhistory_user_id_client_id", PredictionHistory.user_id, PredictionHistory.client_id, unique=True)
+
+
+class SchemaMigration(SQLModel, table=True):
+    """
+    SQLModel recording a schema migration applied to the database.
+    """
+    __tablename__ = "schema_migrations"
+
+    version: int = Field(primary_key=True)
+    description: str = Field(..., max_length=200)
+    applied_at: datetime = Field(default=None)
+
+
+def sqlite_pragmas(journal_mode: str, synchronous: str, busy_timeout_ms: int, mmap_size: int) -> list[str]:
+    """
+    Get the PRAGMA statements configuring a SQLite connection. WAL lets readers run alongside
+    the writer, the busy timeout makes a locked writer wait instead of failing immediately, and
+    normal synchronous is durable with WAL apart from the last commits on power loss.
+    """
+    if journal_mode.lower() not in SQLITE_JOURNAL_MODES:
+        raise ValueError(f"Unknown SQLite journal mode {journal_mode}")
+    if synchronous.lower() not in SQLITE_SYNCHRONOUS_LEVELS:
+        raise ValueError(f"Unknown SQLite synchronous level {synchronous}")
+
+    return [
+        f"PRAGMA journal_mode={journal_mode.lower()}",
+        f"PRAGMA synchronous={synchronous.lower()}",
+        f"PRAGMA busy_timeout={int(busy_timeout_ms)}",
+        f"PRAGMA mmap_size={int(mmap_size)}",
+    ]
+
+
+def create_database_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """
+    Create the async engine for a database URL with the configured pool. Any database with an
+    async driver can be used, e.g. postgresql+asyncpg, and SQLite connections get the
+    configured pragmas when they are opened.
+    """
+    database_engine = create_async_engine(url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW,
+                                          pool_timeout=POOL_TIMEOUT)
 
+    if database_engine.dialect.name == "sqlite":
+        pragmas = sqlite_pragmas(SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE)
 
-# Create engine from database location and create all SQLModel tables.
-engine = create_engine("sqlite:///database.db")
-SQLModel.metadata.create_all(engine)
+        @event.listens_for(database_engine.sync_engine, "connect")
+        def set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    return database_engine
+
+
+# Create an async engine from the configured database, so queries do not block the event loop.
+engine = create_database_engine()
+
+
+async def get_session():
+    """
+    FastAPI dependency providing one session for the whole request. Dependencies and the route
+    share it, so objects loaded while authenticating can be used and updated by the route.
+    Objects are not expired on commit, as reloading their attributes would need an await.
+    """
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
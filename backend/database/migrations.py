@@ -0,0 +1,137 @@
+"""
+Versioned schema migrations. SQLModel.metadata.create_all only creates missing tables, so
+changes to existing tables are applied here, in order, to databases created by older versions.
+Applied versions are recorded in the schema_migrations table.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import Connection, func, inspect, select, text, update
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.schema import CreateColumn
+from sqlmodel import SQLModel
+
+from backend.database.database import PredictionHistory, SchemaMigration, User, engine
+
+
+@dataclass(frozen=True)
+class Migration:
+    """
+    A schema change, applied with a synchronous connection inside the startup transaction.
+    """
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+
+def require_unique(connection: Connection, column):
+    """
+    Refuse to add a unique index over a column that already holds duplicates, naming them so
+    they can be resolved by hand rather than silently dropping accounts.
+    """
+    statement = select(column).group_by(column).having(func.count() > 1).limit(10)
+    duplicates = connection.execute(statement).scalars().all()
+    if duplicates:
+        raise RuntimeError(f"Cannot add a unique index on {column}, duplicate values: {duplicates}")
+
+
+def create_model_index(connection: Connection, table, name: str):
+    """
+    Create an index declared on a model, which new databases already get from create_all.
+    """
+    index = next(index for index in table.indexes if index.name == name)
+    index.create(connection, checkfirst=True)
+
+
+def add_model_column(connection: Connection, table, name: str):
+    """
+    Add a column declared on a model to an existing table, unless create_all already made it.
+    The column needs a server default when it is not nullable, to fill in existing rows.
+    """
+    if name in {column["name"] for column in inspect(connection).get_columns(table.name)}:
+        return
+    column_ddl = CreateColumn(table.c[name]).compile(dialect=connection.dialect)
+    table_name = connection.dialect.identifier_preparer.format_table(table)
+    connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+
+
+def add_unique_user_indexes(connection: Connection):
+    """
+    Index the username and email of users, which are looked up on every authenticated request.
+    """
+    user_table = User.__table__
+    for column in (user_table.c.username, user_table.c.email):
+        require_unique(connection, column)
+        create_model_index(connection, user_table, f"ix_user_{column.name}")
+
+
+def add_history_user_index(connection: Connection):
+    """
+    Index prediction history by user and recency, for paging through a user's history.
+    """
+    create_model_index(connection, PredictionHistory.__table__, "ix_predictionhistory_user_id_created_at")
+
+
+def add_history_count(connection: Connection):
+    """
+    Add the maintained count of each user's prediction history and backfill it from the history.
+    """
+    user_table = User.__table__
+    history_table = PredictionHistory.__table__
+    add_model_column(connection, user_table, "history_count")
+
+    history_count = (select(func.count(history_table.c.id))
+                     .where(history_table.c.user_id == user_table.c.id)
+                     .scalar_subquery())
+    connection.execute(update(user_table).values(history_count=history_count))
+
+
+def add_history_client_id(connection: Connection):
+    """
+    Add the client id of prediction history entries, unique per user, for idempotent uploads.
+    """
+    history_table = PredictionHistory.__table__
+    add_model_column(connection, history_table, "client_id")
+    create_model_index(connection, history_table, "ix_predictionhistory_user_id_client_id")
+
+
+# Every migration, in the order they are applied. Versions are never reused or reordered.
+MIGRATIONS = [
+    Migration(1, "Unique indexes on user username and email", add_unique_user_indexes),
+    Migration(2, "Prediction history index on user and creation time", add_history_user_index),
+    Migration(3, "User history count backfilled from prediction history", add_history_count),
+    Migration(4, "Prediction history client id unique per user", add_history_client_id),
+]
+
+
+def run_migrations(connection: Connection) -> list[int]:
+    """
+    Apply every migration newer than the database, and return the versions applied.
+    """
+    applied = set(connection.execute(select(SchemaMigration.version)).scalars())
+
+    upgraded = []
+    for migration in MIGRATIONS:
+        if migration.version in applied:
+            continue
+        migration.upgrade(connection)
+        connection.execute(SchemaMigration.__table__.insert().values(
+            version=migration.version, description=migration.description, applied_at=datetime.now(timezone.utc)))
+        upgraded.append(migration.version)
+    return upgraded
+
+
+async def init_database(database_engine: AsyncEngine = engine) -> list[int]:
+    """
+    Create any missing tables, then migrate existing ones, in a single transaction so a failed
+    migration leaves the database unchanged. Called once when the app starts. Returns the
+    versions applied.
+    """
+    async with database_engine.begin() as connection:
+        if connection.dialect.name == "sqlite":
+            # The SQLite driver only opens a transaction before data changes, so open one
+            # explicitly to include the schema changes.
+            await connection.exec_driver_sql("BEGIN IMMEDIATE")
+        await connection.run_sync(SQLModel.metadata.create_all)
+        return await connection.run_sync(run_migrations)
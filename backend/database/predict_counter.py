@@ -0,0 +1,101 @@
+"""
+Write-behind accumulator for user predict counts, so predictions do not write to the
+database on the request path.
+"""
+import asyncio
+from typing import Awaitable, Callable
+
+from backend.configs.config import get_config
+from backend.database.user_queries import database_add_predict_counts
+
+# Longest time a user's predict count can go without being written to the database.
+PREDICT_COUNT_FLUSH_SECONDS = float(get_config().get("DATABASE", "predict_count_flush_seconds"))
+
+
+class PredictCounter:
+    """
+    Accumulates predict counts per user id in memory and writes them with one batched update
+    at most every interval_seconds, bounding how stale the stored counts can be. Counts still
+    pending are kept when a write fails and retried on the next flush. On shutdown the lifespan
+    stops the background writer after any write in progress, then flushes once more, so a clean
+    stop loses no counts. Writes are never cancelled, since a cancelled write may still commit
+    in the driver's thread. Only used from the event loop.
+    """
+    def __init__(self, write: Callable[[dict[int, int]], Awaitable[None]], interval_seconds: float = 1):
+        if interval_seconds <= 0:
+            raise ValueError("Flush interval must be positive")
+
+        self.write = write
+        self.interval_seconds = interval_seconds
+        self.flushes = 0
+        self.failures = 0
+
+        self._counts: dict[int, int] = {}
+        self._writing: dict[int, int] = {}
+        self._lock: asyncio.Lock | None = None
+
+    def add(self, user_id: int, count: int = 1):
+        """
+        Add to the predict count of a user.
+        """
+        self._counts[user_id] = self._counts.get(user_id, 0) + count
+
+    def pending(self, user_id: int) -> int:
+        """
+        Get the predict count of a user that has not been written yet, including a write in progress.
+        """
+        return self._counts.get(user_id, 0) + self._writing.get(user_id, 0)
+
+    async def flush(self):
+        """
+        Write every pending count in a single batch.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self._counts:
+                return
+
+            self._writing, self._counts = self._counts, {}
+            try:
+                await self.write(self._writing)
+                self.flushes += 1
+            except Exception:
+                # Keep the counts for the next flush, merged with any added meanwhile.
+                self.failures += 1
+                for user_id, count in self._writing.items():
+                    self.add(user_id, count)
+                raise
+            finally:
+                self._writing = {}
+
+    async def run(self, stop: asyncio.Event):
+        """
+        Flush pending counts every interval until the stop event is set. A failed write is retried
+        on the next interval, and a write in progress when stop is set is finished first.
+        """
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), self.interval_seconds)
+            except TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> dict:
+        """
+        Get the number of users with pending counts and the flush counters.
+        """
+        return {
+            "interval_seconds": self.interval_seconds,
+            "pending_users": len(self._counts),
+            "pending_predictions": sum(self._counts.values()),
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+# Predict counts of logged-in users waiting to be written to the database, shared by the routers.
+predict_counts = PredictCounter(database_add_predict_counts, PREDICT_COUNT_FLUSH_SECONDS)
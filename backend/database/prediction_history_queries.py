@@ -1,40 +1,83 @@
 """
 Module containing functions to perform prediction history queries on the database.
 """
+import base64
+import binascii
 from datetime import datetime, timezone
 
-from sqlmodel import Session, select, func
+from sqlalchemy import insert, tuple_, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.database.database import engine, User, PredictionHistory
+from backend.database.database import PredictionHistory, User
 
 
-def add_prediction_history(prediction_string: str, user_id: int):
+async def add_prediction_history(session: AsyncSession, prediction_string: str, user_id: int):
     """
-    Add prediction history for a user.
+    Add prediction history for a user, counting it in the user's history_count in the same transaction.
     """
-    with Session(engine) as session:
-        session.add(PredictionHistory(user_id=user_id, content=prediction_string,
-                                      created_at=datetime.now(timezone.utc)))
-        session.commit()
+    session.add(PredictionHistory(user_id=user_id, content=prediction_string,
+                                  created_at=datetime.now(timezone.utc)))
+    await session.exec(update(User).where(User.id == user_id).values(history_count=User.history_count + 1))
+    await session.commit()
 
 
-def get_prediction_history(user_id: int, total: int):
+async def add_prediction_history_batch(session: AsyncSession, user_id: int, entries: list[dict]) -> int:
     """
-    Get a number of the most recent prediction history for a user.
+    Add prediction history entries for a user, each a dict of client_id, content and created_at,
+    in one transaction with a single bulk insert, counting them in the user's history_count.
+    Entries whose client id the user already saved are skipped. Returns the number added.
     """
-    with (Session(engine) as session):
-        statement = (select(PredictionHistory)
-                     .where(PredictionHistory.user_id == user_id)
-                     .order_by(PredictionHistory.created_at.desc())).limit(total)
-        results = session.exec(statement).all()
-        return results
+    client_ids = [entry["client_id"] for entry in entries]
+    statement = (select(PredictionHistory.client_id)
+                 .where(PredictionHistory.user_id == user_id, PredictionHistory.client_id.in_(client_ids)))
+    saved = set((await session.exec(statement)).all())
 
+    rows = []
+    for entry in entries:
+        if entry["client_id"] not in saved:
+            saved.add(entry["client_id"])
+            rows.append({"user_id": user_id, **entry})
 
-def get_prediction_history_size(email: str) -> int:
+    if rows:
+        await session.exec(insert(PredictionHistory), params=rows)
+        await session.exec(update(User).where(User.id == user_id)
+                           .values(history_count=User.history_count + len(rows)))
+    await session.commit()
+    return len(rows)
+
+
+def encode_history_cursor(entry: PredictionHistory) -> str:
+    """
+    Get an opaque cursor pointing after a history entry, from its creation time and id.
+    """
+    position = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(position.encode("utf-8")).decode("ascii")
+
+
+def decode_history_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Get the creation time and id of the entry a cursor points after. Raises ValueError for
+    cursors that were not created by encode_history_cursor.
+    """
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValueError("Invalid history cursor")
+
+
+async def get_prediction_history(session: AsyncSession, user_id: int, total: int,
+                                 after: tuple[datetime, int] | None = None):
     """
-    Get size of prediction history queries.
+    Get a number of the most recent prediction history for a user, optionally starting after the
+    (created_at, id) position of a cursor. Seeks through the (user_id, created_at, id) index, so
+    every page costs the same however deep into the history it is.
     """
-    with Session(engine) as session:
-        statement = select(func.count(PredictionHistory.user_id)).join(User).where(User.email == email)
-        history_count = session.scalar(statement)
-        return history_count
+    statement = (select(PredictionHistory)
+                 .where(PredictionHistory.user_id == user_id)
+                 .order_by(PredictionHistory.created_at.desc(), PredictionHistory.id.desc())).limit(total)
+    if after is not None:
+        statement = statement.where(tuple_(PredictionHistory.created_at, PredictionHistory.id) < tuple_(*after))
+    results = (await session.exec(statement)).all()
+    return results
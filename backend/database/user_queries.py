@@ -3,80 +3,77 @@ Module containing functions to perform user queries on the database.
 """
 from datetime import datetime, timezone
 
-from sqlmodel import Session, select
+from sqlalchemy import bindparam, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from backend.database.database import engine, User
 
 
-def get_user_username(username):
+async def get_user_username(session: AsyncSession, username):
     """
     Get a user based on their username.
     """
-    with Session(engine) as session:
-        # Determine if user exists and then return the first user.
-        if username is not None:
-            statement = select(User).where(User.username == username)
-            user = session.exec(statement).first()
-            return user
-        return None
+    # Determine if user exists and then return the first user.
+    if username is not None:
+        statement = select(User).where(User.username == username)
+        user = (await session.exec(statement)).first()
+        return user
+    return None
 
 
-def get_user_email(email):
+async def get_user_email(session: AsyncSession, email):
     """
     Get a user based on their email.
     """
-    with Session(engine) as session:
-        # Determine if user exists and then return the first user.
-        if email is not None:
-            statement = select(User).where(User.email == email)
-            user = session.exec(statement).first()
-            return user
-        return None
+    # Determine if user exists and then return the first user.
+    if email is not None:
+        statement = select(User).where(User.email == email)
+        user = (await session.exec(statement)).first()
+        return user
+    return None
 
 
-def database_create_user(username: str, email: str, password: str):
+async def database_create_user(session: AsyncSession, username: str, email: str, password: str):
     """
     Create a user in the database with the supplied username, email, and hashed password.
     """
-    with Session(engine) as session:
-        session.add(User(username=username, email=email,
-                         password_hashed=password,
-                         created_at=datetime.now(timezone.utc), last_login=datetime.now(timezone.utc)))
-        session.commit()
+    session.add(User(username=username, email=email,
+                     password_hashed=password,
+                     created_at=datetime.now(timezone.utc), last_login=datetime.now(timezone.utc)))
+    await session.commit()
 
 
-def database_update_login_time(email: str):
+async def database_update_login_time(session: AsyncSession, user: User):
     """
     Update the last login time for the user.
     """
-    with Session(engine) as session:
-        user = get_user_email(email)
-        user.last_login = datetime.now(timezone.utc)
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+    user.last_login = datetime.now(timezone.utc)
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
 
 
-def database_update_password(email: str, password_hashed: str):
+async def database_update_password(session: AsyncSession, user: User, password_hashed: str):
     """
-    Updated the password for the supplied email's user.
+    Updated the password for the supplied user.
     """
-    with Session(engine) as session:
-        user = get_user_email(email)
-        user.password_hashed = password_hashed
-        session.add(user)
-        session.commit()
-        session.refresh(user)
-        return user
+    user.password_hashed = password_hashed
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
 
 
-def database_increment_predict_count(email: str):
+async def database_add_predict_counts(counts: dict[int, int]):
     """
-    Increment the predict count for the supplied email.
+    Add to the predict count of every user id in the mapping, in one batched update. Runs from
+    the background flush rather than a request, so it uses its own connection.
     """
-    with Session(engine) as session:
-        user = get_user_email(email)
-        user.total_predictions = user.total_predictions + 1
-        session.add(user)
-        session.commit()
-        session.refresh(user)
+    user_table = User.__table__
+    statement = (update(user_table)
+                 .where(user_table.c.id == bindparam("user_id"))
+                 .values(total_predictions=user_table.c.total_predictions + bindparam("count")))
+    async with engine.begin() as connection:
+        await connection.execute(statement, [{"user_id": user_id, "count": count}
+                                             for user_id, count in counts.items()])
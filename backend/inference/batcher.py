@@ -0,0 +1,212 @@
+"""
+Dynamic micro-batching scheduler that combines concurrent prediction requests
+into a single model forward pass.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+import numpy as np
+
+from backend.inference.executor import InferenceExecutor, InferenceQueueFull
+from backend.inference.stats import Histogram
+
+# Queue wait buckets in microseconds.
+QUEUE_WAIT_BUCKETS_US = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+@dataclass
+class _PendingRequest:
+    """
+    Rows submitted by a single caller and the future their output rows are sent to.
+    """
+    rows: np.ndarray
+    future: asyncio.Future
+    enqueued_ns: int = field(default_factory=time.perf_counter_ns)
+
+
+class MicroBatcher:
+    """
+    Collect rows submitted concurrently on the event loop into one (N, features) batch,
+    bounded by a maximum batch size and a maximum wait, and run a single forward over it.
+    When an executor is supplied the forward runs there instead of on the event loop, with
+    up to max_concurrent_batches batches in flight at once.
+
+    With a prepare function, each request's rows are written by prepare(rows, out) straight
+    into their slice of a float32 input buffer reused between batches, instead of being stacked
+    into a new array. The forward must not return a view of that input.
+    """
+    def __init__(self, forward: Callable[[np.ndarray], np.ndarray], max_batch_size: int = 64,
+                 max_wait_us: int = 2000, max_queue_size: int = 1024,
+                 executor: InferenceExecutor | None = None, max_concurrent_batches: int = 1,
+                 prepare: Callable[[np.ndarray, np.ndarray], object] | None = None):
+        self.forward = forward
+        self.prepare = prepare
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.max_queue_size = max_queue_size
+        self.executor = executor
+        self.max_concurrent_batches = max_concurrent_batches
+        self.rejected = 0
+
+        self.batch_sizes = Histogram(_powers_of_two(max_batch_size))
+        self.queue_wait_us = Histogram(QUEUE_WAIT_BUCKETS_US)
+
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._carry: _PendingRequest | None = None
+        self._slots: asyncio.Semaphore | None = None
+        # Input buffers not used by a batch in flight, at most one per concurrent batch.
+        self._buffers: list[np.ndarray] = []
+
+    async def submit(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Queue a (k, features) array for the next batch and wait for its k output rows.
+        Rows from one call are always kept in the same batch. Raises InferenceQueueFull
+        when too many requests are already waiting.
+        """
+        self._ensure_started()
+        if self._queue.qsize() >= self.max_queue_size:
+            self.rejected += 1
+            raise InferenceQueueFull(self.executor.retry_after if self.executor else 1)
+
+        request = _PendingRequest(rows=rows, future=self._loop.create_future())
+        self._queue.put_nowait(request)
+        return await request.future
+
+    def stats(self) -> dict:
+        """
+        Get the batch size and queue wait distributions of the scheduler.
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": self.max_wait_us,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "rejected": self.rejected,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_us": self.queue_wait_us.snapshot(),
+        }
+
+    def _ensure_started(self):
+        """
+        Start the batching task on the running loop if it is not already running there.
+        """
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and not self._worker.done() and self._loop is loop:
+            return
+
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._carry = None
+        self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """
+        Main scheduler loop. Waits for a free dispatch slot and a first request, then keeps
+        collecting until the batch is full or the maximum wait has elapsed, and dispatches it.
+        """
+        max_wait = self.max_wait_us / 1_000_000
+        while True:
+            # Requests keep queueing while every slot is busy, so the next batch picks them all up.
+            await self._slots.acquire()
+
+            if self._carry is not None:
+                first, self._carry = self._carry, None
+            else:
+                first = await self._queue.get()
+
+            batch = [first]
+            total_rows = len(first.rows)
+            deadline = self._loop.time() + max_wait
+
+            while total_rows < self.max_batch_size:
+                try:
+                    request = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        request = await asyncio.wait_for(self._queue.get(), timeout)
+                    except TimeoutError:
+                        break
+
+                # Hold a request that would overflow the batch for the next one.
+                if total_rows + len(request.rows) > self.max_batch_size:
+                    self._carry = request
+                    break
+
+                batch.append(request)
+                total_rows += len(request.rows)
+
+            dispatch = self._loop.create_task(self._dispatch(batch, total_rows))
+            dispatch.add_done_callback(lambda _: self._slots.release())
+
+    async def _dispatch(self, batch: list[_PendingRequest], total_rows: int):
+        """
+        Run one forward pass over the batch and send each caller its own rows.
+        """
+        dispatch_ns = time.perf_counter_ns()
+        for request in batch:
+            self.queue_wait_us.observe((dispatch_ns - request.enqueued_ns) / 1000)
+        self.batch_sizes.observe(total_rows)
+
+        buffer = None
+        try:
+            if self.prepare is not None:
+                buffer, inputs = self._gather(batch, total_rows)
+            elif len(batch) > 1:
+                inputs = np.concatenate([request.rows for request in batch])
+            else:
+                inputs = batch[0].rows
+            if self.executor is not None:
+                outputs = await self.executor.run(self.forward, inputs)
+            else:
+                outputs = self.forward(inputs)
+        except Exception as exc:
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(exc)
+            return
+        finally:
+            if buffer is not None:
+                self._buffers.append(buffer)
+
+        start = 0
+        for request in batch:
+            end = start + len(request.rows)
+            if not request.future.done():
+                request.future.set_result(outputs[start:end])
+            start = end
+
+    def _gather(self, batch: list[_PendingRequest], total_rows: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Write the rows of every request in the batch through prepare into a free input buffer,
+        and return the buffer and the batch view of it.
+        """
+        features = batch[0].rows.shape[1]
+        buffer = self._buffers.pop() if self._buffers else None
+        if buffer is None or len(buffer) < total_rows or buffer.shape[1] != features:
+            buffer = np.empty((max(self.max_batch_size, total_rows), features), dtype=np.float32)
+
+        inputs = buffer[:total_rows]
+        start = 0
+        for request in batch:
+            end = start + len(request.rows)
+            self.prepare(request.rows, inputs[start:end])
+            start = end
+        return buffer, inputs
+
+
+def _powers_of_two(limit: int) -> list[int]:
+    """
+    Get the powers of two up to and including the limit.
+    """
+    bounds = [1]
+    while bounds[-1] < limit:
+        bounds.append(bounds[-1] * 2)
+    return bounds
@@ -0,0 +1,83 @@
+"""
+LRU cache of predictions keyed on normalized landmarks quantized to a grid, so repeated
+poses skip the forward pass.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.inference.registry import ModelOutput
+
+
+class PredictionCache:
+    """
+    Bounded LRU mapping from a quantized normalized landmark row and model version to the
+    prediction for that row. Rows whose values round to the same grid cells share an entry.
+    Only used from the event loop, so it needs no locking.
+    """
+    def __init__(self, max_size: int = 4096, grid: float = 0.01):
+        if max_size <= 0 or grid <= 0:
+            raise ValueError("Cache size and grid must be positive")
+
+        self.max_size = max_size
+        self.grid = grid
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: OrderedDict[tuple[str, bytes], ModelOutput] = OrderedDict()
+
+    def key(self, row: np.ndarray, version: str) -> tuple[str, bytes]:
+        """
+        Get the cache key of a normalized landmark row for a model version.
+        """
+        return version, np.rint(np.asarray(row) / self.grid).astype(np.int32).tobytes()
+
+    def get(self, row: np.ndarray, version: str) -> ModelOutput | None:
+        """
+        Get the cached prediction of a row, marking it as most recently used.
+        """
+        key = self.key(row, version)
+        output = self._entries.get(key)
+        if output is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return output
+
+    def put(self, row: np.ndarray, output: ModelOutput):
+        """
+        Store the prediction of a row under the version of the model that made it,
+        evicting the least recently used entry when the cache is full. The probabilities are
+        copied, as they are usually a view into a whole batch's output that the entry would
+        otherwise keep alive.
+        """
+        key = self.key(row, output.version)
+        self._entries[key] = ModelOutput(output.probabilities.copy(), output.label_classes, output.version)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Remove every entry, e.g. after a model swap.
+        """
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Get the size and hit, miss and eviction counters of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "max_size": self.max_size,
+            "grid": self.grid,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
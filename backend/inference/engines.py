@@ -0,0 +1,90 @@
+"""
+Model backends that turn a batch of normalized landmark rows into class probabilities.
+"""
+import os
+
+import numpy as np
+
+from backend.inference.numpy_model import NumpyClassifier, softmax
+
+MODEL_DIR = "backend" + os.path.sep + "model" + os.path.sep
+
+# Precisions the torch backend can serve. Variants other than float32 are written by export_model.py.
+PRECISIONS = ("float32", "int8", "float16", "bfloat16")
+
+
+def torch_model_file(precision: str) -> str:
+    """
+    Get the file name of the TorchScript model exported at a precision.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown model precision: {precision}")
+    return "landmark_model.pt" if precision == "float32" else f"landmark_model_{precision}.pt"
+
+
+class TorchEngine:
+    """
+    Run the TorchScript model exported by train_model.py, or one of its reduced-precision variants.
+    """
+    name = "torch"
+
+    def __init__(self, model_path: str, precision: str = "float32"):
+        # Imported here so that the numpy backend never has to load torch.
+        import torch
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} does not exist, run backend/model/export_model.py to create it")
+
+        self._torch = torch
+        self.precision = precision
+        # float16 and bfloat16 models expect inputs of their own dtype, int8 models take float32.
+        self.input_dtype = {"float16": torch.float16, "bfloat16": torch.bfloat16}.get(precision, torch.float32)
+        self.model = torch.compile(torch.jit.load(model_path))
+        self.model.eval()
+
+    def predict_proba(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Get the class probabilities for an (N, 63) float32 batch.
+        """
+        with self._torch.no_grad():
+            output = self.model(self._torch.from_numpy(batch).to(self.input_dtype))
+            return self._torch.softmax(output.float(), dim=1).numpy()
+
+
+class NumpyEngine:
+    """
+    Run the BatchNorm-folded weights written by export_model.py using only NumPy.
+    """
+    name = "numpy"
+
+    def __init__(self, weights_path: str):
+        self.model = NumpyClassifier.load(weights_path)
+
+    def predict_proba(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Get the class probabilities for an (N, 63) float32 batch.
+        """
+        return softmax(self.model(batch))
+
+
+def model_file(backend: str, precision: str = "float32") -> str:
+    """
+    Get the file name of the model served by a backend at a precision.
+    """
+    if backend == "torch":
+        return torch_model_file(precision)
+    if backend == "numpy":
+        if precision != "float32":
+            raise ValueError("The numpy backend only supports float32 precision")
+        return "landmark_model.npz"
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def load_engine(backend: str, precision: str = "float32", model_dir: str = MODEL_DIR) -> TorchEngine | NumpyEngine:
+    """
+    Load the model files for the selected backend and precision.
+    """
+    path = os.path.join(model_dir, model_file(backend, precision))
+    if backend == "torch":
+        return TorchEngine(path, precision)
+    return NumpyEngine(path)
@@ -0,0 +1,120 @@
+"""
+Dedicated executor for running inference work off the asyncio event loop.
+"""
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable
+
+from backend.inference.stats import Histogram
+
+# Queue wait buckets in microseconds.
+EXECUTOR_WAIT_BUCKETS_US = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+class InferenceQueueFull(Exception):
+    """
+    Raised when there is no room left to queue more inference work.
+    """
+    def __init__(self, retry_after: int = 1):
+        super().__init__("Inference queue is full")
+        self.retry_after = retry_after
+
+
+def _timed_call(fn: Callable, args: tuple) -> tuple[int, int, Any]:
+    """
+    Run a function in a worker and return the times it started and finished alongside its result.
+    The monotonic clock is system wide, so it can be compared across processes.
+    """
+    started_ns = time.monotonic_ns()
+    result = fn(*args)
+    return started_ns, time.monotonic_ns(), result
+
+
+class InferenceExecutor:
+    """
+    Thread or process pool fed by a bounded queue. Work submitted while the queue is full
+    is rejected immediately with InferenceQueueFull instead of waiting.
+    """
+    def __init__(self, mode: str = "thread", workers: int = 1, max_queue_size: int = 64,
+                 retry_after: int = 1):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+        self.mode = mode
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.retry_after = retry_after
+
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_us = Histogram(EXECUTOR_WAIT_BUCKETS_US)
+        self.run_us = Histogram(EXECUTOR_WAIT_BUCKETS_US)
+
+        self._pool: Executor | None = None
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """
+        Run a blocking function in the pool and wait for its result. In process mode the
+        function and its arguments must be picklable.
+        """
+        if self.pending >= self.max_queue_size:
+            self.rejected += 1
+            raise InferenceQueueFull(self.retry_after)
+
+        self.pending += 1
+        enqueued_ns = time.monotonic_ns()
+        try:
+            loop = asyncio.get_running_loop()
+            started_ns, finished_ns, result = await loop.run_in_executor(self._get_pool(), _timed_call, fn, args)
+        finally:
+            self.pending -= 1
+
+        self.completed += 1
+        self.queue_wait_us.observe((started_ns - enqueued_ns) / 1000)
+        self.run_us.observe((finished_ns - started_ns) / 1000)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Get the queue depth, wait and run times and rejection counts of the executor.
+        """
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_us": self.queue_wait_us.snapshot(),
+            "run_us": self.run_us.snapshot(),
+        }
+
+    def shutdown(self):
+        """
+        Stop the worker pool, waiting for running work to finish.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def reset_pool(self):
+        """
+        Replace the worker pool, so new work runs in freshly started workers while work
+        already submitted finishes in the old pool.
+        """
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def _get_pool(self) -> Executor:
+        """
+        Create the worker pool on first use.
+        """
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="inference")
+        return self._pool
@@ -0,0 +1,104 @@
+"""
+Load the served model and record how long each startup stage takes.
+"""
+import hashlib
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from backend.inference.engines import MODEL_DIR, NumpyEngine, TorchEngine, load_engine, model_file
+
+LABELS_FILE = "label_classes.npy"
+
+
+@dataclass
+class LoadedModel:
+    """
+    A loaded model engine, the labels of its classes, the version identifying its files
+    and the time each loading stage took.
+    """
+    engine: TorchEngine | NumpyEngine
+    label_classes: np.ndarray
+    version: str = "unknown"
+    model_dir: str = MODEL_DIR
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+def elapsed_ms(start_ns: int) -> float:
+    """
+    Get the milliseconds elapsed since a perf_counter_ns timestamp.
+    """
+    return (time.perf_counter_ns() - start_ns) / 1_000_000
+
+
+def model_files(backend: str, precision: str, model_dir: str = MODEL_DIR) -> list[str]:
+    """
+    Get the paths of the files a model is loaded from.
+    """
+    return [os.path.join(model_dir, model_file(backend, precision)), os.path.join(model_dir, LABELS_FILE)]
+
+
+def model_version(paths: list[str]) -> str:
+    """
+    Get a short content hash identifying a set of model files.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:12]
+
+
+def files_signature(paths: list[str]) -> tuple:
+    """
+    Get the modification time and size of each file, to cheaply detect when model files change.
+    Missing files are included as None.
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def load_model(backend: str, precision: str, model_dir: str = MODEL_DIR) -> LoadedModel:
+    """
+    Load the model engine and label classes, timing each stage.
+    """
+    timings = {}
+
+    start = time.perf_counter_ns()
+    engine = load_engine(backend, precision, model_dir)
+    timings["load_engine"] = elapsed_ms(start)
+
+    start = time.perf_counter_ns()
+    label_classes = np.load(os.path.join(model_dir, LABELS_FILE), allow_pickle=True)
+    timings["load_labels"] = elapsed_ms(start)
+
+    return LoadedModel(engine=engine, label_classes=label_classes,
+                       version=model_version(model_files(backend, precision, model_dir)),
+                       model_dir=model_dir, timings_ms=timings)
+
+
+def warm_up_batch_sizes(max_batch_size: int) -> list[int]:
+    """
+    Get the batch sizes to warm up at: powers of two up to the largest batch the scheduler builds.
+    """
+    sizes = [1]
+    while sizes[-1] * 2 < max_batch_size:
+        sizes.append(sizes[-1] * 2)
+    if sizes[-1] != max_batch_size:
+        sizes.append(max_batch_size)
+    return sizes
+
+
+def warm_up_batch(batch_size: int, features: int = 63) -> np.ndarray:
+    """
+    Get a batch of synthetic raw landmark rows in the image coordinate range.
+    """
+    return np.random.default_rng(batch_size).uniform(0, 1, size=(batch_size, features)).astype(np.float32)
@@ -0,0 +1,210 @@
+"""
+Per-stage latency instrumentation and rendering of statistics in the Prometheus text format.
+"""
+import os
+import threading
+import time
+
+from starlette.routing import Match
+
+from backend.inference.stats import Histogram
+
+# Stage and request latency buckets in microseconds.
+LATENCY_BUCKETS_US = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000,
+                      500000, 1000000, 2500000)
+
+# Index of this worker among the workers forked by backend/serve.py, 0 in a single server process.
+worker_index = 0
+
+
+def worker_labels() -> dict:
+    """
+    Get the labels identifying this worker process. Workers share one listening socket, so each
+    scrape reaches any of them, and every series carries these labels to keep their values apart.
+    """
+    return {"worker": worker_index, "pid": os.getpid()}
+
+
+class StageTimer:
+    """
+    Record the monotonic nanosecond duration of consecutive stages of a single request.
+    """
+    def __init__(self):
+        self.start_ns = time.perf_counter_ns()
+        self.stages: dict[str, int] = {}
+        self._last_ns = self.start_ns
+
+    def mark(self, stage: str):
+        """
+        End a stage, which started when the previous stage ended. Repeated stages accumulate.
+        """
+        now = time.perf_counter_ns()
+        self.stages[stage] = self.stages.get(stage, 0) + now - self._last_ns
+        self._last_ns = now
+
+    def total_ns(self) -> int:
+        """
+        Get the nanoseconds elapsed since the timer was created.
+        """
+        return time.perf_counter_ns() - self.start_ns
+
+
+class RequestMetrics:
+    """
+    Request counts by method, route and status, request latency by route and stage latency
+    by route and stage. Safe to update from multiple threads.
+    """
+    def __init__(self):
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.request_latency_us: dict[str, Histogram] = {}
+        self.stage_latency_us: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe_request(self, method: str, route: str, status_code: int, duration_ns: int):
+        """
+        Count a finished request and record its latency.
+        """
+        with self._lock:
+            key = (method, route, str(status_code))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.request_latency_us.get(route)
+            if histogram is None:
+                histogram = self.request_latency_us[route] = Histogram(LATENCY_BUCKETS_US)
+        histogram.observe(duration_ns / 1000)
+
+    def observe_stages(self, route: str, timer: StageTimer):
+        """
+        Record the latency of each stage of a request.
+        """
+        for stage, duration_ns in timer.stages.items():
+            with self._lock:
+                histogram = self.stage_latency_us.get((route, stage))
+                if histogram is None:
+                    histogram = self.stage_latency_us[(route, stage)] = Histogram(LATENCY_BUCKETS_US)
+            histogram.observe(duration_ns / 1000)
+
+
+# Request and stage metrics shared by the middleware and the predict routes.
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting HTTP requests and timing them by route template, so that
+    path parameters do not create a new series per value.
+    """
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter_ns()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.metrics.observe_request(scope["method"], route_template(scope), status_code,
+                                         time.perf_counter_ns() - start)
+
+
+def route_template(scope) -> str:
+    """
+    Get the path template of the route that handled a request, or "unmatched". Uses the route
+    recorded in the scope by the router, falling back to matching the app's routes.
+    """
+    route = scope.get("route")
+    if isinstance(getattr(route, "path", None), str):
+        return route.path
+
+    app = scope.get("app")
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        path = getattr(route, "path", None)
+        if isinstance(path, str) and route.matches(scope)[0] == Match.FULL:
+            return path
+    return "unmatched"
+
+
+class PrometheusWriter:
+    """
+    Build a Prometheus text exposition, writing HELP and TYPE once per metric. The constant
+    labels are added to every series.
+    """
+    def __init__(self, prefix: str = "", labels: dict | None = None):
+        self.prefix = prefix
+        self.labels = labels or {}
+        self.lines: list[str] = []
+
+    def _header(self, name: str, kind: str, description: str) -> str:
+        name = self.prefix + name
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def counter(self, name: str, description: str, series: list[tuple[dict, float]]):
+        """
+        Write a counter with one value per label set.
+        """
+        name = self._header(name, "counter", description)
+        for labels, value in series:
+            self.lines.append(f"{name}{format_labels({**labels, **self.labels})} {format_value(value)}")
+
+    def gauge(self, name: str, description: str, series: list[tuple[dict, float]]):
+        """
+        Write a gauge with one value per label set.
+        """
+        name = self._header(name, "gauge", description)
+        for labels, value in series:
+            self.lines.append(f"{name}{format_labels({**labels, **self.labels})} {format_value(value)}")
+
+    def histogram(self, name: str, description: str, series: list[tuple[dict, dict]]):
+        """
+        Write a histogram from Histogram snapshots, one per label set.
+        """
+        name = self._header(name, "histogram", description)
+        for labels, snapshot in series:
+            labels = {**labels, **self.labels}
+            for bound, count in snapshot["buckets"].items():
+                self.lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}")
+            self.lines.append(f"{name}_sum{format_labels(labels)} {format_value(snapshot['sum'])}")
+            self.lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+
+    def render(self) -> str:
+        """
+        Get the exposition text.
+        """
+        return "\n".join(self.lines) + "\n"
+
+
+def format_labels(labels: dict) -> str:
+    """
+    Format a label set, escaping backslashes, quotes and newlines in values.
+    """
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value, writing whole numbers without a decimal point.
+    """
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
@@ -0,0 +1,68 @@
+"""
+Torch-free forward pass of the landmark classifier using NumPy.
+"""
+import numpy as np
+
+# Coefficients of the Abramowitz and Stegun 7.1.26 approximation of erf, accurate to 1.5e-7.
+_ERF_P = 0.3275911
+_ERF_A = (0.254829592, -0.284496736, 1.421413741, -1.453152027, 1.061405429)
+
+
+def erf(x: np.ndarray) -> np.ndarray:
+    """
+    Vectorized error function.
+    """
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1.0 / (1.0 + _ERF_P * x)
+    a1, a2, a3, a4, a5 = _ERF_A
+    polynomial = ((((a5 * t + a4) * t + a3) * t + a2) * t + a1) * t
+    return sign * (1.0 - polynomial * np.exp(-x * x))
+
+
+def gelu(x: np.ndarray) -> np.ndarray:
+    """
+    Exact (erf based) GELU activation, matching torch.nn.GELU().
+    """
+    return 0.5 * x * (1.0 + erf(x * np.float32(1 / np.sqrt(2))))
+
+
+def softmax(logits: np.ndarray) -> np.ndarray:
+    """
+    Row-wise softmax of a batch of logits.
+    """
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class NumpyClassifier:
+    """
+    Batched forward pass of an exported classifier. Each layer is a Linear layer with any
+    BatchNorm already folded into it, and every layer except the last is followed by GELU.
+    Dropout is a no-op at inference time and is left out.
+    """
+    def __init__(self, layers: list[tuple[np.ndarray, np.ndarray]]):
+        # Store weights transposed so each layer is a single (N, in) @ (in, out) BLAS call.
+        self.layers = [(np.ascontiguousarray(weight.T, dtype=np.float32), np.asarray(bias, dtype=np.float32))
+                       for weight, bias in layers]
+
+    @classmethod
+    def load(cls, path: str) -> "NumpyClassifier":
+        """
+        Load a classifier from a weight file written by backend.model.export_model.
+        """
+        with np.load(path) as weights:
+            layer_count = len([name for name in weights.files if name.startswith("weight_")])
+            return cls([(weights[f"weight_{i}"], weights[f"bias_{i}"]) for i in range(layer_count)])
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        """
+        Get the logits for an (N, input_size) batch.
+        """
+        last = len(self.layers) - 1
+        for index, (weight, bias) in enumerate(self.layers):
+            x = x @ weight
+            x += bias
+            if index < last:
+                x = gelu(x)
+        return x
@@ -0,0 +1,142 @@
+"""
+Registry holding the model currently being served, which can be replaced by a new
+version without restarting the process.
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+from fastapi.concurrency import run_in_threadpool
+
+from backend.inference.engines import MODEL_DIR
+from backend.inference.loader import LoadedModel, elapsed_ms, files_signature, load_model, model_files
+
+
+@dataclass
+class ModelOutput:
+    """
+    Class probabilities for a batch of rows together with the labels and version of the model
+    that produced them. Slicing selects rows, so a batch output can be split between callers.
+    """
+    probabilities: np.ndarray
+    label_classes: np.ndarray
+    version: str
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    def __getitem__(self, rows: slice) -> "ModelOutput":
+        return ModelOutput(self.probabilities[rows], self.label_classes, self.version)
+
+
+def forward(model: LoadedModel, batch: np.ndarray) -> ModelOutput:
+    """
+    Run a loaded model over an (N, 63) float32 batch of normalized rows.
+    """
+    return ModelOutput(model.engine.predict_proba(batch), model.label_classes, model.version)
+
+
+class ModelRegistry:
+    """
+    Load model versions in the background and swap them in atomically. Each batch reads the
+    active model once, so requests already running finish on the model they started with.
+    A warm-up coroutine is run on every new model before it is swapped in, and an optional
+    callback is run after each swap. The registry is ready once the active model has been warmed
+    up in this process, so a worker forked with its parent's model is not ready until it has
+    warmed up its own executor.
+    """
+    def __init__(self, backend: str, precision: str,
+                 warm_up: Optional[Callable[[LoadedModel], Awaitable[None]]] = None,
+                 on_swap: Optional[Callable[[LoadedModel], None]] = None):
+        self.backend = backend
+        self.precision = precision
+        self.warm_up = warm_up
+        self.on_swap = on_swap
+
+        self.active: LoadedModel | None = None
+        self.loading: str | None = None
+        self.last_error: str | None = None
+        self.swaps = 0
+
+        self._warmed_pid: int | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether a model is active and has been warmed up in this process.
+        """
+        return self.active is not None and self._warmed_pid == os.getpid()
+
+    def mark_warmed(self):
+        """
+        Record that the active model has been warmed up in this process.
+        """
+        self._warmed_pid = os.getpid()
+
+    async def load(self, model_dir: str = MODEL_DIR) -> LoadedModel:
+        """
+        Load and warm up the model in a directory, then make it the active model.
+        Only one model is loaded at a time, and the active model is kept if loading fails.
+        """
+        async with self._lock:
+            self.loading = model_dir
+            start = time.perf_counter_ns()
+            try:
+                model = await run_in_threadpool(load_model, self.backend, self.precision, model_dir)
+                if self.warm_up is not None:
+                    await self.warm_up(model)
+                model.timings_ms["total"] = elapsed_ms(start)
+            except Exception as exc:
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                raise
+            finally:
+                self.loading = None
+
+            self.active = model
+            self.last_error = None
+            self.swaps += 1
+            self.mark_warmed()
+            if self.on_swap is not None:
+                self.on_swap(model)
+            return model
+
+    async def watch(self, interval: float):
+        """
+        Poll the files of the active model and reload it whenever they change.
+        Failed reloads are recorded in last_error and retried when the files change again.
+        """
+        watched_dir, signature = None, None
+        while True:
+            model_dir = self.active.model_dir if self.active is not None else MODEL_DIR
+            current = files_signature(model_files(self.backend, self.precision, model_dir))
+            if model_dir != watched_dir:
+                # Another version was loaded from elsewhere, start watching its files instead.
+                watched_dir, signature = model_dir, current
+            elif current != signature:
+                signature = current
+                try:
+                    await self.load(model_dir)
+                except Exception:
+                    # Files may still be mid-copy, the next change triggers another attempt.
+                    pass
+            await asyncio.sleep(interval)
+
+    def status(self) -> dict:
+        """
+        Get the active model version and the state of the latest load.
+        """
+        active = self.active
+        return {
+            "backend": self.backend,
+            "precision": self.precision,
+            "version": active.version if active is not None else None,
+            "model_dir": active.model_dir if active is not None else None,
+            "timings_ms": active.timings_ms if active is not None else {},
+            "loading": self.loading,
+            "swaps": self.swaps,
+            "error": self.last_error,
+        }
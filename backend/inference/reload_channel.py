@@ -0,0 +1,46 @@
+"""
+Model reloads shared between the workers forked by backend/serve.py. The admin route only reaches
+the worker that accepted the request, so that worker records the model directory it loaded in a
+file created by the parent and signals the parent, which forwards the signal to every worker.
+The other workers then load the same directory, and workers forked later load it at startup.
+"""
+import json
+import os
+import signal
+
+
+class ReloadChannel:
+    """
+    File holding the latest model directory loaded through the admin route, with the pid of the
+    worker that loaded it. Created by the parent before forking and inherited by every worker.
+    """
+    def __init__(self, path: str):
+        self.path = path
+
+    @staticmethod
+    def signal_number() -> int:
+        """
+        Get the signal sent to the parent and forwarded to the workers, not available on Windows.
+        """
+        return signal.SIGHUP
+
+    def publish(self, model_dir: str):
+        """
+        Record a model directory loaded by this worker and ask the parent to reload every worker.
+        The file is replaced atomically, so a worker never reads a partial request.
+        """
+        temporary_path = f"{self.path}.{os.getpid()}"
+        with open(temporary_path, "w") as request_file:
+            json.dump({"model_dir": model_dir, "pid": os.getpid()}, request_file)
+        os.replace(temporary_path, self.path)
+        os.kill(os.getppid(), self.signal_number())
+
+    def read(self) -> dict | None:
+        """
+        Get the latest reload request, or None if no model was loaded through the admin route.
+        """
+        try:
+            with open(self.path) as request_file:
+                return json.load(request_file)
+        except (OSError, ValueError):
+            return None
@@ -0,0 +1,123 @@
+"""
+Per-session inference context that skips the forward pass for frames that barely moved and
+smooths class probabilities over time.
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from backend.inference.registry import ModelOutput
+
+
+@dataclass
+class SessionState:
+    """
+    Landmark rows of the last frame that went through the model (one row per hand), their
+    probabilities and the exponential moving average of probabilities returned to the client.
+    """
+    landmarks: np.ndarray | None = None
+    probabilities: np.ndarray | None = None
+    smoothed: np.ndarray | None = None
+    label_classes: np.ndarray | None = None
+    version: str | None = None
+    last_seen: float = field(default_factory=time.monotonic)
+
+
+class SessionStore:
+    """
+    Bounded LRU of session states keyed by client token, with sessions idle for longer than
+    the TTL reset on next use. Frames whose normalized landmarks all moved less than the delta
+    threshold since the last inferred frame are answered from the session without inference.
+    Only used from the event loop, so it needs no locking.
+    """
+    def __init__(self, max_sessions: int = 1024, ttl_seconds: float = 300, delta_threshold: float = 0.02,
+                 alpha: float = 0.5):
+        if max_sessions <= 0:
+            raise ValueError("Maximum session count must be positive")
+        if not 0 < alpha <= 1:
+            raise ValueError("Smoothing alpha must be in (0, 1]")
+
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.delta_threshold = delta_threshold
+        self.alpha = alpha
+
+        self.gated = 0
+        self.inferred = 0
+        self.evictions = 0
+
+        self._sessions: OrderedDict[str, SessionState] = OrderedDict()
+
+    def get(self, key: str) -> SessionState:
+        """
+        Get the state of a session, creating it if it is new or has expired.
+        """
+        now = time.monotonic()
+        state = self._sessions.get(key)
+        if state is None or now - state.last_seen > self.ttl_seconds:
+            state = SessionState()
+            self._sessions[key] = state
+            if len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+
+        self._sessions.move_to_end(key)
+        state.last_seen = now
+        return state
+
+    def new(self) -> SessionState:
+        """
+        Create a session state that is not tracked by the store, e.g. for a stream connection.
+        """
+        return SessionState()
+
+    def gate(self, state: SessionState, landmarks: np.ndarray, version: str) -> ModelOutput | None:
+        """
+        Get the smoothed result for the (k, features) normalized landmark rows of a frame when
+        they are within the delta threshold of the last inferred frame of the same model version
+        and hand count, or None if the frame needs inference.
+        """
+        if (state.landmarks is None or state.version != version or state.landmarks.shape != landmarks.shape
+                or np.max(np.abs(landmarks - state.landmarks)) >= self.delta_threshold):
+            return None
+
+        # Keep converging towards the last inferred probabilities while the pose is held.
+        state.smoothed = self.alpha * state.probabilities + (1 - self.alpha) * state.smoothed
+        self.gated += 1
+        return ModelOutput(state.smoothed, state.label_classes, state.version)
+
+    def update(self, state: SessionState, landmarks: np.ndarray, output: ModelOutput) -> ModelOutput:
+        """
+        Record the (k, features) landmark rows of an inferred frame and get their results smoothed
+        with the previous frames. The average restarts when the model version or hand count changes.
+        The probabilities are copied, so a session does not keep the whole batch output alive.
+        """
+        probabilities = output.probabilities.copy()
+        if (state.smoothed is None or state.version != output.version
+                or state.smoothed.shape != probabilities.shape):
+            state.smoothed = probabilities
+        else:
+            state.smoothed = self.alpha * probabilities + (1 - self.alpha) * state.smoothed
+
+        state.landmarks = landmarks
+        state.probabilities = probabilities
+        state.label_classes = output.label_classes
+        state.version = output.version
+        self.inferred += 1
+        return ModelOutput(state.smoothed, output.label_classes, output.version)
+
+    def stats(self) -> dict:
+        """
+        Get the number of tracked sessions and how many frames were answered without inference.
+        """
+        return {
+            "max_sessions": self.max_sessions,
+            "sessions": len(self._sessions),
+            "delta_threshold": self.delta_threshold,
+            "alpha": self.alpha,
+            "gated": self.gated,
+            "inferred": self.inferred,
+            "evictions": self.evictions,
+        }
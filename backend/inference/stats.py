@@ -0,0 +1,76 @@
+"""
+Lightweight distribution tracking used to expose inference statistics.
+"""
+import bisect
+import threading
+
+
+class Histogram:
+    """
+    Histogram with fixed bucket upper bounds, safe to observe from multiple threads.
+    """
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        # One extra slot for observations larger than the last bucket.
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """
+        Record a single observation.
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+            self._max = max(self._max, value)
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate a quantile as the upper bound of the bucket it falls into.
+        Quantiles past the last bucket report the largest observed value.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            largest = self._max
+        if total == 0:
+            return 0.0
+
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            cumulative += count
+            if cumulative >= rank:
+                return float(self.buckets[index]) if index < len(self.buckets) else largest
+        return largest
+
+    def snapshot(self) -> dict:
+        """
+        Get the current state of the histogram with cumulative bucket counts.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            total_sum = self._sum
+
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = total
+
+        return {
+            "count": total,
+            "sum": total_sum,
+            "mean": total_sum / total if total else 0.0,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets,
+        }
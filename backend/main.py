@@ -2,6 +2,8 @@
 Main file for running FastAPI backend. Declares standard
 predict endpoint and basic settings for backend.
 """
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -9,16 +11,49 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from backend.configs.config import get_config
+from backend.database.database import engine
+from backend.database.migrations import init_database
+from backend.database.predict_counter import predict_counts
 
-from backend.routers import predict, auth, account
+from backend.inference.metrics import MetricsMiddleware, request_metrics
+from backend.routers import predict, auth, account, metrics
 
-app = FastAPI()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create and migrate the database tables, then load and warm up the model in the background, so
+    the server can answer /ready while it starts, and write predict counts periodically. On shutdown,
+    stop the background tasks, letting a predict count write in progress finish rather than cancelling
+    it, write the remaining predict counts, then close the database connections and stop the inference
+    executor even if that write fails.
+    """
+    await init_database()
+    startup = asyncio.create_task(predict.start_inference())
+    stop_counts_writer = asyncio.Event()
+    counts_writer = asyncio.create_task(predict_counts.run(stop_counts_writer))
+    yield
+    startup.cancel()
+    with suppress(asyncio.CancelledError):
+        await startup
+    stop_counts_writer.set()
+    await counts_writer
+    try:
+        await predict_counts.flush()
+    finally:
+        await engine.dispose()
+        predict.executor.shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 prefix = get_config().get('HOST', 'path')
 
 app.include_router(predict.router, prefix=prefix)
 app.include_router(auth.router, prefix=prefix)
 app.include_router(account.router, prefix=prefix)
+app.include_router(metrics.router, prefix=prefix)
 
 app.add_middleware(
     CORSMiddleware,
@@ -26,7 +61,10 @@ app.add_middleware(
     allow_credentials=get_config().get('CORS', 'allow_credentials'),
     allow_methods=get_config().get('CORS', 'allow_methods'),
     allow_headers=get_config().get('CORS', 'allow_headers'),
+    # Let the frontend read the pagination cursor of the prediction history.
+    expose_headers=[account.NEXT_CURSOR_HEADER],
 )
+app.add_middleware(MetricsMiddleware, metrics=request_metrics)
 
 
 if __name__ == "__main__":
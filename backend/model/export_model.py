@@ -0,0 +1,131 @@
+"""
+Export the trained TorchScript model to a compact NumPy weight file with every
+BatchNorm layer folded into the Linear layer before it, and to quantized and
+reduced-precision TorchScript variants.
+"""
+import os
+import sys
+
+import numpy as np
+import torch
+from torch import nn
+
+from backend.inference.engines import torch_model_file
+from backend.inference.numpy_model import NumpyClassifier
+from backend.model.model_classes.ASLClassifier import ASLClassifier
+
+# Location of the TorchScript model and the exported weight file.
+MODEL_FILE = "landmark_model.pt"
+WEIGHTS_FILE = "landmark_model.npz"
+
+# BatchNorm1d default epsilon used by ASLClassifier.
+BATCH_NORM_EPS = 1e-5
+
+
+def fold_batch_norm(state_dict, eps: float = BATCH_NORM_EPS) -> list[tuple[np.ndarray, np.ndarray]]:
+    """
+    Fold each eval-mode BatchNorm layer in a Sequential classifier's state dict into the
+    preceding Linear layer and return the resulting (weight, bias) pairs in order.
+    """
+    # Group parameters by the index of their module in the Sequential model (i.e. model.0.weight).
+    modules = {}
+    for key, value in state_dict.items():
+        _, index, name = key.rsplit(".", 2)
+        modules.setdefault(int(index), {})[name] = np.asarray(value, dtype=np.float64)
+
+    layers = []
+    for index in sorted(modules):
+        params = modules[index]
+        if "running_mean" in params:
+            # y = gamma * (Wx + b - mean) / sqrt(var + eps) + beta
+            weight, bias = layers[-1]
+            scale = params["weight"] / np.sqrt(params["running_var"] + eps)
+            layers[-1] = (weight * scale[:, None], (bias - params["running_mean"]) * scale + params["bias"])
+        else:
+            layers.append((params["weight"], params["bias"]))
+
+    return [(weight.astype(np.float32), bias.astype(np.float32)) for weight, bias in layers]
+
+
+def save_weights(layers: list[tuple[np.ndarray, np.ndarray]], output_path: str):
+    """
+    Write folded layers to a weight file readable by NumpyClassifier.load.
+    """
+    arrays = {}
+    for index, (weight, bias) in enumerate(layers):
+        arrays[f"weight_{index}"] = weight
+        arrays[f"bias_{index}"] = bias
+    np.savez(output_path, **arrays)
+
+
+def export_numpy_weights(model_path: str = MODEL_FILE, output_path: str = WEIGHTS_FILE,
+                         tolerance: float = 1e-4) -> float:
+    """
+    Export a TorchScript model to a folded weight file and check the NumPy forward pass
+    against the TorchScript model. Returns the largest difference in logits, relative to
+    the size of the TorchScript logit.
+    """
+    model = torch.jit.load(model_path)
+    model.eval()
+    layers = fold_batch_norm(model.state_dict())
+    save_weights(layers, output_path)
+
+    # Compare both forward passes at a few batch sizes on inputs in the normalized landmark range.
+    max_difference = 0.0
+    numpy_model = NumpyClassifier.load(output_path)
+    for batch_size in (1, 8, 64):
+        x = torch.rand(batch_size, layers[0][0].shape[1]) * 2 - 1
+        with torch.no_grad():
+            expected = model(x).numpy()
+        difference = np.abs(numpy_model(x.numpy()) - expected) / (1 + np.abs(expected))
+        max_difference = max(max_difference, float(np.max(difference)))
+
+    if max_difference > tolerance:
+        raise ValueError(f"Exported weights differ from the TorchScript model by {max_difference}")
+
+    print(f"Exported {output_path} (max logit difference {max_difference:.2e})")
+    return max_difference
+
+
+def load_classifier(model_path: str = MODEL_FILE) -> ASLClassifier:
+    """
+    Rebuild an eager ASLClassifier in eval mode from the weights of a TorchScript model.
+    """
+    state_dict = torch.jit.load(model_path).state_dict()
+    linear_weights = [value for value in state_dict.values() if value.dim() == 2]
+
+    model = ASLClassifier(input_size=linear_weights[0].shape[1],
+                          hidden_sizes=[weight.shape[0] for weight in linear_weights[:-1]],
+                          num_classes=linear_weights[-1].shape[0])
+    model.load_state_dict(state_dict)
+    model.eval()
+    return model
+
+
+def export_precision_variants(model_path: str = MODEL_FILE, output_dir: str = "."):
+    """
+    Export dynamically quantized INT8, float16 and bfloat16 TorchScript variants of a model,
+    named so the torch backend can select them with the INFERENCE precision option.
+    """
+    example = torch.rand(1, load_classifier(model_path).model[0].in_features) * 2 - 1
+
+    # Dynamic quantization stores Linear weights as int8 and quantizes activations on the fly.
+    int8_model = torch.ao.quantization.quantize_dynamic(load_classifier(model_path), {nn.Linear},
+                                                       dtype=torch.qint8)
+    with torch.no_grad():
+        torch.jit.trace(int8_model, example).save(os.path.join(output_dir, torch_model_file("int8")))
+
+    for precision, dtype in (("float16", torch.float16), ("bfloat16", torch.bfloat16)):
+        model = load_classifier(model_path).to(dtype)
+        with torch.no_grad():
+            torch.jit.trace(model, example.to(dtype)).save(os.path.join(output_dir, torch_model_file(precision)))
+
+    print(f"Exported int8, float16 and bfloat16 variants to {output_dir}")
+
+
+if __name__ == "__main__":
+    # Usage: export_model.py [model_path] [output_dir]
+    source = sys.argv[1] if len(sys.argv) > 1 else MODEL_FILE
+    destination = sys.argv[2] if len(sys.argv) > 2 else "."
+    export_numpy_weights(source, os.path.join(destination, WEIGHTS_FILE))
+    export_precision_variants(source, destination)
@@ -0,0 +1,181 @@
+"""
+Compare the float32 model against its quantized and reduced-precision variants.
+Reports validation accuracy, CPU latency at several batch sizes and memory use,
+so the cheapest model that meets the accuracy bar can be picked for serving.
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from backend.inference.engines import MODEL_DIR, PRECISIONS, load_engine, torch_model_file
+from backend.utils.preprocessing import normalize_landmarks_batch
+
+DATASET_FILE = "asl_landmarks.csv"
+REPORT_FILE = "precision_report.json"
+
+# Batch sizes the latency of each variant is measured at.
+BATCH_SIZES = (1, 8, 64, 512)
+
+# Seed and validation size used by train_model.py, so the same validation split is rebuilt.
+SEED = 42
+VALIDATION_SIZE = 0.2
+
+
+def load_validation_split(dataset_path: str):
+    """
+    Rebuild the normalized validation split used by train_model.py.
+    Returns None when the landmark dataset has not been extracted.
+    """
+    if not os.path.exists(dataset_path):
+        return None
+
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder
+
+    df = pd.read_csv(dataset_path, header=None)
+    x = normalize_landmarks_batch(df.iloc[:, :-1].values).astype(np.float32)
+    y = LabelEncoder().fit_transform(df.iloc[:, -1].values)
+
+    _, x_val, _, y_val = train_test_split(x, y, test_size=VALIDATION_SIZE, random_state=SEED, stratify=y)
+    return x_val, y_val
+
+
+def current_rss() -> int | None:
+    """
+    Get the resident set size of this process in bytes, where /proc is available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def predict_classes(engine, x: np.ndarray, chunk_size: int = 4096) -> np.ndarray:
+    """
+    Get the predicted class of every row, in chunks to bound memory use.
+    """
+    return np.concatenate([engine.predict_proba(x[start:start + chunk_size]).argmax(axis=1)
+                           for start in range(0, len(x), chunk_size)])
+
+
+def measure_latency(engine, batch_size: int, repeats: int) -> dict:
+    """
+    Time repeated forward passes at a batch size after a short warm-up.
+    """
+    batch = np.random.default_rng(SEED).uniform(-1, 1, size=(batch_size, 63)).astype(np.float32)
+    for _ in range(10):
+        engine.predict_proba(batch)
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        engine.predict_proba(batch)
+        timings.append(time.perf_counter_ns() - start)
+
+    median_us = float(np.median(timings)) / 1000
+    return {
+        "median_us": median_us,
+        "p95_us": float(np.percentile(timings, 95)) / 1000,
+        "per_sample_us": median_us / batch_size,
+    }
+
+
+def build_report(model_dir: str = MODEL_DIR, dataset_path: str | None = None, repeats: int = 200) -> dict:
+    """
+    Measure every available variant against the torch float32 baseline.
+    """
+    validation = load_validation_split(dataset_path or os.path.join(model_dir, DATASET_FILE))
+    if validation is not None:
+        x_eval, y_eval = validation
+    else:
+        # Without the dataset only agreement with the baseline on synthetic frames can be reported.
+        x_eval = np.random.default_rng(SEED).uniform(-1, 1, size=(4096, 63)).astype(np.float32)
+        y_eval = None
+
+    variants = [("torch", precision, torch_model_file(precision)) for precision in PRECISIONS]
+    variants.append(("numpy", "float32", "landmark_model.npz"))
+
+    baseline_classes = None
+    results = []
+    for backend, precision, file_name in variants:
+        path = os.path.join(model_dir, file_name)
+        if not os.path.exists(path):
+            results.append({"backend": backend, "precision": precision, "skipped": f"{file_name} not found"})
+            continue
+
+        rss_before = current_rss()
+        engine = load_engine(backend, precision, model_dir)
+        classes = predict_classes(engine, x_eval)
+        if baseline_classes is None:
+            baseline_classes = classes
+
+        result = {
+            "backend": backend,
+            "precision": precision,
+            "model_bytes": os.path.getsize(path),
+            "agreement_with_baseline": float(np.mean(classes == baseline_classes)),
+            "latency": {str(batch_size): measure_latency(engine, batch_size, repeats)
+                        for batch_size in BATCH_SIZES},
+        }
+        if y_eval is not None:
+            result["validation_accuracy"] = float(np.mean(classes == y_eval))
+        if rss_before is not None:
+            # Approximate, as variants are loaded one after another into the same process.
+            result["rss_increase_bytes"] = current_rss() - rss_before
+        results.append(result)
+
+    baseline = results[0]
+    if "validation_accuracy" in baseline:
+        for result in results:
+            if "validation_accuracy" in result:
+                result["accuracy_delta"] = result["validation_accuracy"] - baseline["validation_accuracy"]
+
+    return {
+        "baseline": "torch/float32",
+        "evaluated_on": "validation split" if y_eval is not None else "synthetic frames",
+        "evaluation_rows": len(x_eval),
+        "batch_sizes": list(BATCH_SIZES),
+        "variants": results,
+    }
+
+
+def write_report(model_dir: str = MODEL_DIR, dataset_path: str | None = None,
+                 output_path: str | None = None, repeats: int = 200) -> dict:
+    """
+    Build the report, save it as JSON and print a summary table.
+    """
+    report = build_report(model_dir, dataset_path, repeats)
+    output_path = output_path or os.path.join(model_dir, REPORT_FILE)
+    with open(output_path, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+    print(f"Precision report ({report['evaluated_on']}, {report['evaluation_rows']} rows) -> {output_path}")
+    for result in report["variants"]:
+        name = f"{result['backend']}/{result['precision']}"
+        if "skipped" in result:
+            print(f"  {name:<16} skipped: {result['skipped']}")
+            continue
+        if "validation_accuracy" in result:
+            accuracy = f"accuracy={result['validation_accuracy']:.4f}"
+        else:
+            accuracy = f"agreement={result['agreement_with_baseline']:.4f}"
+        latencies = "  ".join(f"b{size}={result['latency'][str(size)]['median_us']:.0f}us" for size in BATCH_SIZES)
+        print(f"  {name:<16} {accuracy}  size={result['model_bytes'] / 1024:.0f}KiB  {latencies}")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--dataset", default=None, help="landmark CSV, defaults to the model directory")
+    parser.add_argument("--output", default=None, help="report path, defaults to the model directory")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    write_report(args.model_dir, args.dataset, args.output, args.repeats)
@@ -13,8 +13,10 @@ from torch import nn
 from torch.utils.data import DataLoader
 import torch.optim as optim
 
+import export_model
 import extract_landmarks
-from backend.utils.preprocessing import normalize_landmarks
+import precision_report
+from backend.utils.preprocessing import normalize_landmarks_batch
 from model_classes.ASLDataset import ASLDataset
 from model_classes.ASLClassifier import ASLClassifier
 
@@ -46,7 +48,7 @@ def main():
     y = df.iloc[:, -1].values   # labels
 
     # Normalize landmark data.
-    x = np.array([normalize_landmarks(landmark_row) for landmark_row in x_raw])
+    x = normalize_landmarks_batch(x_raw)
 
     # Create labels for each dataset (i.e. A, B, C, ...)
     label_encoder = LabelEncoder()
@@ -131,6 +133,14 @@ def main():
         traced_model = torch.jit.trace(model, torch.randn(1, 63))
         traced_model.save("landmark_model.pt")
 
+    # Export BatchNorm-folded weights for the torch-free numpy inference backend
+    # and the quantized and reduced-precision variants for the torch backend.
+    export_model.export_numpy_weights("landmark_model.pt", "landmark_model.npz")
+    export_model.export_precision_variants("landmark_model.pt", ".")
+
+    # Compare the variants against the float32 model on the validation split.
+    precision_report.write_report(".", "asl_landmarks.csv", "precision_report.json")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,21 +1,40 @@
 """
 Router for account backend.
 """
-from datetime import datetime
-
-from fastapi import APIRouter, Depends, status, HTTPException
-from pydantic import BaseModel
-
-from backend.database.database import User
-from backend.database.prediction_history_queries import (get_prediction_history_size,
-                                                         add_prediction_history, get_prediction_history)
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.configs.config import get_config
+from backend.database.database import User, get_session
+from backend.database.predict_counter import predict_counts
+from backend.database.prediction_history_queries import (add_prediction_history, get_prediction_history,
+                                                         add_prediction_history_batch, encode_history_cursor,
+                                                         decode_history_cursor)
 from backend.models.account_models import AccountDataResponse, PasswordResetRequest
-from backend.utils.auth.auth import update_password
-from backend.utils.auth.auth_users import get_authenticated_user, get_current_active_user
+from backend.utils.auth.auth import update_password, verify_password
+from backend.utils.auth.auth_users import get_current_active_user
 
 # Create router for this class to be referenced by main.
 router = APIRouter()
 
+# Default and largest number of prediction history entries returned per page, pulled from config.
+HISTORY_PAGE_SIZE = int(get_config().get("ACCOUNT", "history_page_size"))
+HISTORY_MAX_PAGE_SIZE = int(get_config().get("ACCOUNT", "history_max_page_size"))
+
+# Most prediction history entries that can be saved in one request, pulled from config.
+HISTORY_MAX_BATCH_SIZE = int(get_config().get("ACCOUNT", "history_max_batch_size"))
+
+# How far ahead of the server clock a client timestamp may be before it is rejected.
+MAX_CLIENT_CLOCK_SKEW = timedelta(minutes=5)
+
+# Response header holding the cursor of the next page of prediction history.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 class PredictionHistoryPayload(BaseModel):
     """
@@ -24,6 +43,23 @@ class PredictionHistoryPayload(BaseModel):
     prediction_string: str
 
 
+class PredictionHistoryEntry(BaseModel):
+    """
+    A base model representing a prediction string saved by the client, with an id chosen by the
+    client so a retried upload does not save it twice, and the time the client created it.
+    """
+    client_id: str = Field(..., min_length=1, max_length=64)
+    prediction_string: str = Field(..., max_length=1000)
+    created_at: datetime
+
+
+class PredictionHistoryBatchPayload(BaseModel):
+    """
+    A base model representing prediction strings to be added for a user in one request.
+    """
+    entries: list[PredictionHistoryEntry] = Field(..., min_length=1, max_length=HISTORY_MAX_BATCH_SIZE)
+
+
 class PredictionHistoryResponse(BaseModel):
     """
     A base model for a response to the prediction history request.
@@ -33,21 +69,66 @@ class PredictionHistoryResponse(BaseModel):
 
 
 @router.post('/account/add-prediction')
-async def add_prediction(data: PredictionHistoryPayload, user: User = Depends(get_current_active_user)):
+async def add_prediction(data: PredictionHistoryPayload, user: User = Depends(get_current_active_user),
+                         session: AsyncSession = Depends(get_session)):
     """
     Endpoint to add prediction to history
     """
-    add_prediction_history(data.prediction_string, user.id)
+    await add_prediction_history(session, data.prediction_string, user.id)
 
     return {"message": "Prediction added"}
 
 
+@router.post('/account/add-predictions')
+async def add_predictions(data: PredictionHistoryBatchPayload, user: User = Depends(get_current_active_user),
+                          session: AsyncSession = Depends(get_session)):
+    """
+    Endpoint to add a batch of predictions to history in one transaction. Entries with a client id
+    the user already saved are skipped, so a failed upload can be retried as is.
+    """
+    latest = datetime.now(timezone.utc) + MAX_CLIENT_CLOCK_SKEW
+    entries = []
+    for entry in data.entries:
+        # Timestamps without a time zone are taken as UTC, like the ones the server stores.
+        created_at = entry.created_at if entry.created_at.tzinfo else entry.created_at.replace(tzinfo=timezone.utc)
+        if created_at > latest:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail="Prediction history entries cannot be created in the future")
+        entries.append({"client_id": entry.client_id, "content": entry.prediction_string,
+                        "created_at": created_at.astimezone(timezone.utc)})
+
+    # The user is expired by a rollback, so keep its id for a retry.
+    user_id = user.id
+    try:
+        added = await add_prediction_history_batch(session, user_id, entries)
+    except IntegrityError:
+        # A concurrent retry of the same upload saved some of the entries first, skip them now.
+        await session.rollback()
+        added = await add_prediction_history_batch(session, user_id, entries)
+
+    return {"message": "Predictions added", "added": added, "skipped": len(entries) - added}
+
+
 @router.get('/account/get-predictions')
-async def get_prediction(user: User = Depends(get_current_active_user)):
+async def get_prediction(response: Response,
+                         limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE),
+                         cursor: str | None = None,
+                         user: User = Depends(get_current_active_user),
+                         session: AsyncSession = Depends(get_session)):
     """
-    Endpoint to get a list of prediction histories for a user.
+    Endpoint to get a page of prediction histories for a user, newest first. When more entries
+    remain, the X-Next-Cursor header holds the cursor to pass to get the next page.
     """
-    history = get_prediction_history(user.id, 10)
+    try:
+        after = decode_history_cursor(cursor) if cursor is not None else None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    # Fetch one extra entry to know whether there is a next page.
+    history = await get_prediction_history(session, user.id, limit + 1, after)
+    if len(history) > limit:
+        history = history[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_history_cursor(history[-1])
 
     return history
 
@@ -55,33 +136,31 @@ async def get_prediction(user: User = Depends(get_current_active_user)):
 @router.get('/account/info')
 async def info_user(user: User = Depends(get_current_active_user)) -> AccountDataResponse:
     """
-    Endpoint to get the current user information.
+    Endpoint to get the current user information. Everything comes from the user row loaded
+    while authenticating, with the history size maintained in history_count.
     """
-    prediction_history_size = get_prediction_history_size(user.email)
-
     return AccountDataResponse(username=user.username, email=user.email,
-                               total_predictions=user.total_predictions,
-                               prediction_history_size=prediction_history_size, last_login=user.last_login,
+                               total_predictions=user.total_predictions + predict_counts.pending(user.id),
+                               prediction_history_size=user.history_count, last_login=user.last_login,
                                creation_date=user.created_at)
 
 
 @router.post('/account/change-password')
 async def reset_password(data: PasswordResetRequest,
-                         user: User = Depends(get_current_active_user)):
+                         user: User = Depends(get_current_active_user),
+                         session: AsyncSession = Depends(get_session)):
     """
     Endpoint to handle password reset requests.
     """
-    # Attempt to authenticate the user with current password before
-    user = get_authenticated_user(user.username, data.current_password)
-
-    if user is None:
+    # Check the current password of the authenticated user before changing it.
+    if not await run_in_threadpool(verify_password, data.current_password, user.password_hashed.encode("utf-8")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Your current password is incorrect",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    user = update_password(user.email, data.new_password)
+    user = await update_password(session, user, data.new_password)
 
     if user is None:
         raise HTTPException(
@@ -5,6 +5,10 @@ from typing import Annotated, Optional
 
 from fastapi import APIRouter, Depends, status, HTTPException, Response, Request
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy.exc import IntegrityError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.database.database import get_session
 
 from backend.models.auth_models import RegisterRequest, Token
 from backend.utils.auth.auth_tokens import create_tokens, get_current_token, \
@@ -18,12 +22,13 @@ router = APIRouter()
 
 @router.post('/auth/login')
 async def login_user(response: Response,
-                     form_data: Annotated[OAuth2PasswordRequestForm, Depends()]) -> Token:
+                     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+                     session: AsyncSession = Depends(get_session)) -> Token:
     """
     Endpoint to handle a user login request using OAuth2 standards.
     """
     # Attempt to get an authenticated user based off of the supplied data.
-    user = get_authenticated_user(form_data.username, form_data.password)
+    user = await get_authenticated_user(session, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,27 +42,37 @@ async def login_user(response: Response,
 
 
 @router.post('/auth/register')
-async def register_user(response: Response, register_data: RegisterRequest) -> Token:
+async def register_user(response: Response, register_data: RegisterRequest,
+                        session: AsyncSession = Depends(get_session)) -> Token:
     """
     Endpoint to handle a user register request.
     """
     # Determine if a user with this username already exists.
-    if check_user_exists(register_data.username):
+    if await check_user_exists(session, register_data.username):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Username already exists",
             headers={"WWW-Authenticate": "Bearer"}
         )
     # Determine if a user with this email already exists.
-    if check_user_email_exists(register_data.email):
+    if await check_user_email_exists(session, register_data.email):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email already exists",
             headers={"WWW-Authenticate": "Bearer"}
         )
 
-    # Create user and then generate an access and refresh tokens and add as cookies.
-    create_user(register_data.username, register_data.email, register_data.password)
+    # Create user and then generate an access and refresh tokens and add as cookies. The unique
+    # indexes catch a concurrent registration of the same username or email.
+    try:
+        await create_user(session, register_data.username, register_data.email, register_data.password)
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Username or email already exists",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
     access_token = create_tokens(data={"sub": register_data.username}, response=response)
 
     return Token(username=register_data.username, access_token=access_token)
@@ -0,0 +1,95 @@
+"""
+Router exposing request, stage and inference metrics in the Prometheus text format.
+"""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from backend.database.predict_counter import predict_counts
+from backend.inference.metrics import PrometheusWriter, request_metrics, worker_labels
+from backend.routers import predict
+from backend.utils.process_memory import process_memory
+
+# Create router for this class to be referenced by main.
+router = APIRouter()
+
+# Prefix of every exported metric name.
+METRIC_PREFIX = "asl_"
+
+# Content type of the Prometheus text exposition format.
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def build_metrics() -> str:
+    """
+    Collect the current request, stage, scheduler, executor, cache, session, predict count, model and
+    memory metrics of this worker, labelled with its worker index and pid.
+    """
+    writer = PrometheusWriter(METRIC_PREFIX, worker_labels())
+
+    writer.counter("http_requests_total", "HTTP requests by method, route and status code.",
+                   [({"method": method, "route": route, "status": status_code}, count)
+                    for (method, route, status_code), count in sorted(request_metrics.requests.items())])
+    writer.histogram("http_request_duration_microseconds", "HTTP request latency by route.",
+                     [({"route": route}, histogram.snapshot())
+                      for route, histogram in sorted(request_metrics.request_latency_us.items())])
+    writer.histogram("predict_stage_duration_microseconds", "Latency of each stage of the predict routes.",
+                     [({"route": route, "stage": stage}, histogram.snapshot())
+                      for (route, stage), histogram in sorted(request_metrics.stage_latency_us.items())])
+
+    batcher = predict.batcher.stats()
+    writer.histogram("batch_size", "Rows in each micro-batch forward pass.", [({}, batcher["batch_size"])])
+    writer.histogram("batcher_queue_wait_microseconds", "Time requests wait for their micro-batch.",
+                     [({}, batcher["queue_wait_us"])])
+    writer.gauge("batcher_queue_depth", "Requests waiting for a micro-batch.", [({}, batcher["queue_depth"])])
+    writer.counter("batcher_rejected_total", "Requests rejected because the batch queue was full.",
+                   [({}, batcher["rejected"])])
+
+    executor = predict.executor.stats()
+    writer.histogram("executor_queue_wait_microseconds", "Time work waits for an inference worker.",
+                     [({}, executor["queue_wait_us"])])
+    writer.histogram("executor_run_microseconds", "Time inference workers spend on each forward pass.",
+                     [({}, executor["run_us"])])
+    writer.gauge("executor_queue_depth", "Work queued or running in the inference executor.",
+                 [({}, executor["queue_depth"])])
+    writer.counter("executor_rejected_total", "Work rejected because the executor queue was full.",
+                   [({}, executor["rejected"])])
+
+    if predict.cache is not None:
+        cache = predict.cache.stats()
+        writer.counter("cache_lookups_total", "Prediction cache lookups by result.",
+                       [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+        writer.counter("cache_evictions_total", "Prediction cache entries evicted.", [({}, cache["evictions"])])
+        writer.gauge("cache_entries", "Entries held by the prediction cache.", [({}, cache["size"])])
+
+    if predict.sessions is not None:
+        sessions = predict.sessions.stats()
+        writer.counter("session_frames_total", "Session frames by whether inference ran.",
+                       [({"result": "gated"}, sessions["gated"]), ({"result": "inferred"}, sessions["inferred"])])
+        writer.gauge("sessions", "Sessions tracked by the session store.", [({}, sessions["sessions"])])
+
+    counts = predict_counts.stats()
+    writer.gauge("predict_counts_pending", "Predictions counted but not yet written to the database.",
+                 [({}, counts["pending_predictions"])])
+    writer.counter("predict_count_flushes_total", "Batched predict count writes by result.",
+                   [({"result": "ok"}, counts["flushes"]), ({"result": "error"}, counts["failures"])])
+
+    model = predict.registry.status()
+    writer.gauge("model_info", "Model being served, the value is 1 once a model is loaded.",
+                 [({"version": model["version"] or "", "backend": model["backend"],
+                    "precision": model["precision"]}, 1 if model["version"] else 0)])
+    writer.counter("model_swaps_total", "Models loaded and swapped in.", [({}, model["swaps"])])
+
+    memory = process_memory()
+    if memory is not None:
+        writer.gauge("process_memory_bytes", "Memory of this worker process by kind, pss splits shared pages.",
+                     [({"kind": kind}, value) for kind, value in memory.items()])
+
+    return writer.render()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    FastAPI route for scraping metrics in the Prometheus text format.
+    """
+    return PlainTextResponse(build_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,38 +1,94 @@
 """
 Predict route
 """
+import asyncio
 import os
+import sys
 import time
+import traceback
 from typing import Optional
 
-import torch
 import numpy as np
 
-from pydantic import BaseModel
-from fastapi import APIRouter, Depends
+from pydantic import BaseModel, ValidationError
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, WebSocket
+from fastapi.exceptions import RequestValidationError
+from fastapi.concurrency import run_in_threadpool
 
+from backend.configs.config import get_config
 from backend.database.database import User
-from backend.database.user_queries import database_increment_predict_count
-from backend.utils.auth.auth_users import get_current_user_optional
-from backend.utils.preprocessing import normalize_landmarks
+from backend.database.predict_counter import predict_counts
+from backend.inference.batcher import MicroBatcher
+from backend.inference.cache import PredictionCache
+from backend.inference.executor import InferenceExecutor, InferenceQueueFull
+from backend.inference.engines import MODEL_DIR
+from backend.inference.loader import LoadedModel, elapsed_ms, warm_up_batch, warm_up_batch_sizes
+from backend.inference.metrics import StageTimer, request_metrics, worker_labels
+from backend.inference.reload_channel import ReloadChannel
+from backend.inference.registry import ModelOutput, ModelRegistry, forward
+from backend.inference.sessions import SessionState, SessionStore
+from backend.utils.auth.auth_tokens import get_current_token, verify_admin_token
+from backend.utils.auth.auth_users import get_current_user_optional, get_websocket_user
+from backend.utils.preprocessing import normalize_landmarks_batch
+from backend.utils.wire_format import LANDMARK_CONTENT_TYPE, WireFormatError, decode_landmark_frames
 
 router = APIRouter()
 
-device = torch.device("cpu")
+# Model backend (torch or numpy) and precision (float32, int8, float16 or bfloat16) pulled from config.
+MODEL_BACKEND = get_config().get("INFERENCE", "backend")
+MODEL_PRECISION = get_config().get("INFERENCE", "precision")
 
-model = torch.jit.load("backend" + os.path.sep + "model" + os.path.sep + "landmark_model.pt")
-model = torch.compile(model)
-model.eval()
-label_classes = np.load("backend" + os.path.sep + "model" + os.path.sep +
-                        "label_classes.npy", allow_pickle=True)
+# Number of values in a single hand's landmark row (21 landmarks with x, y and z).
+LANDMARK_FEATURES = 63
+
+# Most hands that can be predicted from a single frame.
+MAX_HANDS = 2
+
+# Micro-batching settings pulled from config.
+MAX_BATCH_SIZE = int(get_config().get("INFERENCE", "max_batch_size"))
+MAX_WAIT_US = int(get_config().get("INFERENCE", "max_wait_us"))
+MAX_QUEUE_SIZE = int(get_config().get("INFERENCE", "max_queue_size"))
+MAX_SEQUENCE_LENGTH = int(get_config().get("INFERENCE", "max_sequence_length"))
+
+# Inference executor settings pulled from config.
+EXECUTOR_MODE = get_config().get("INFERENCE", "executor")
+EXECUTOR_WORKERS = int(get_config().get("INFERENCE", "executor_workers"))
+EXECUTOR_QUEUE_SIZE = int(get_config().get("INFERENCE", "executor_queue_size"))
+RETRY_AFTER_SECONDS = int(get_config().get("INFERENCE", "retry_after_seconds"))
+
+# Number of forward passes run at each batch shape during warm-up.
+WARM_UP_ITERATIONS = int(get_config().get("INFERENCE", "warm_up_iterations"))
+
+# Directory holding one subdirectory per loadable model version, and how often to check the
+# active model's files for changes (0 disables the watcher).
+MODEL_VERSIONS_DIR = get_config().get("INFERENCE", "model_versions_dir")
+MODEL_WATCH_SECONDS = float(get_config().get("INFERENCE", "model_watch_seconds"))
+
+# Prediction cache size (0 disables the cache) and the grid normalized landmarks are quantized to.
+CACHE_SIZE = int(get_config().get("INFERENCE", "cache_size"))
+CACHE_GRID = float(get_config().get("INFERENCE", "cache_grid"))
+
+# Per-session delta gating and smoothing settings (a session count of 0 disables sessions).
+SESSION_MAX_COUNT = int(get_config().get("INFERENCE", "session_max_count"))
+SESSION_TTL_SECONDS = float(get_config().get("INFERENCE", "session_ttl_seconds"))
+SESSION_DELTA_THRESHOLD = float(get_config().get("INFERENCE", "session_delta_threshold"))
+SESSION_SMOOTHING_ALPHA = float(get_config().get("INFERENCE", "session_smoothing_alpha"))
 
 
 class LandmarkInput(BaseModel):
     """
-    Class for storing landmark input data.
+    Class for storing landmark input data of a single frame, with the 63 values of each hand
+    in the frame one after the other.
     """
     landmarks: list[float]
 
+    def to_frames(self) -> list[list[float]]:
+        """
+        Get the landmark data as a list of hands.
+        """
+        return [self.landmarks[start:start + LANDMARK_FEATURES]
+                for start in range(0, len(self.landmarks), LANDMARK_FEATURES)]
+
 
 class LandmarkSequenceInput(BaseModel):
     """
@@ -40,54 +96,527 @@ class LandmarkSequenceInput(BaseModel):
     """
     landmarks: list[list[float]]
 
+    def to_frames(self) -> list[list[float]]:
+        """
+        Get the landmark data as a list of frames.
+        """
+        return self.landmarks
+
+
+class HandPrediction(BaseModel):
+    """
+    Class for storing the prediction of a single hand in a frame.
+    """
+    prediction: str
+    confidence: float
+
 
 class PredictionResult(BaseModel):
     """
-    Class for storing a prediction result.
+    Class for storing a prediction result. The top-level prediction is that of the first hand,
+    and hands holds the prediction of every hand in the frame in the order they were sent.
     """
     prediction: str
     confidence: float
     accuracy: float
     probabilities: list[str] | None = None
-    inferenceTimeMs: int
+    inferenceTimeMs: float
+    modelVersion: str | None = None
+    hands: list[HandPrediction] = []
 
 
-def current_time_milli():
+class FramePrediction(BaseModel):
     """
-    Get current time in milliseconds
+    Class for storing the prediction of a single frame in a sequence.
     """
-    return round(time.time() * 1000)
+    prediction: str
+    confidence: float
 
 
-@router.post("/predict")
-async def predict(input_data: LandmarkInput,
-                  current_user: Optional[User] = Depends(get_current_user_optional)):
+class SequencePredictionResult(BaseModel):
     """
-    FastAPI route for receiving and predicting landmark data from the frontend.
+    Class for storing the per-frame predictions of a sequence and the aggregated top result.
+    """
+    prediction: str
+    confidence: float
+    frames: list[FramePrediction]
+    inferenceTimeMs: float
+    modelVersion: str | None = None
+
+
+class ModelLoadInput(BaseModel):
+    """
+    Class for storing the model version to load, None reloads the default model directory.
+    """
+    version: str | None = None
+
+
+def predict_with(model: LoadedModel, landmarks: np.ndarray) -> ModelOutput:
+    """
+    Normalize a batch of raw landmark rows and return the class probabilities for each row.
+    """
+    normalized = normalize_landmarks_batch(landmarks)
+    return forward(model, np.asarray(normalized, dtype=np.float32))
+
+
+def predict_batch(landmarks: np.ndarray) -> ModelOutput:
+    """
+    Predict a batch of raw landmark rows with the active model. The model is read once,
+    so a swap never splits a batch between two versions.
+    """
+    return predict_with(registry.active, landmarks)
+
+
+def predict_normalized(normalized: np.ndarray) -> ModelOutput:
+    """
+    Predict a batch of already normalized landmark rows with the active model.
+    """
+    return forward(registry.active, normalized)
+
+
+# Pool that runs preprocessing and the forward pass off the event loop.
+executor = InferenceExecutor(mode=EXECUTOR_MODE, workers=EXECUTOR_WORKERS,
+                             max_queue_size=EXECUTOR_QUEUE_SIZE, retry_after=RETRY_AFTER_SECONDS)
+
+# Scheduler combining concurrent /predict calls into a single forward pass. Raw frames are
+# normalized straight into the batch's model input buffer.
+batcher = MicroBatcher(predict_normalized, max_batch_size=MAX_BATCH_SIZE, max_wait_us=MAX_WAIT_US,
+                       max_queue_size=MAX_QUEUE_SIZE, executor=executor,
+                       max_concurrent_batches=EXECUTOR_WORKERS, prepare=normalize_landmarks_batch)
+
+
+async def warm_up(model: LoadedModel):
+    """
+    Run warm-up batches at every batch shape the scheduler can produce, then once at every
+    sequence length /predict/sequence accepts, so the first real requests do not pay for lazy
+    initialization or shape specialization. Thread workers are warmed through the executor,
+    which also starts them. Process workers only see a model once they are forked after the
+    swap, so in process mode the model is warmed in this process before they start.
+    """
+    async def run_warm_up(batch: np.ndarray):
+        if executor.mode == "thread":
+            await executor.run(predict_with, model, batch)
+        else:
+            await run_in_threadpool(predict_with, model, batch)
+
+    batch_sizes = warm_up_batch_sizes(MAX_BATCH_SIZE)
+    for batch_size in batch_sizes:
+        stage_start = time.perf_counter_ns()
+        batch = warm_up_batch(batch_size, LANDMARK_FEATURES)
+        for _ in range(WARM_UP_ITERATIONS):
+            await run_warm_up(batch)
+        model.timings_ms[f"warm_up_batch_{batch_size}"] = elapsed_ms(stage_start)
+
+    stage_start = time.perf_counter_ns()
+    sequence = warm_up_batch(MAX_SEQUENCE_LENGTH, LANDMARK_FEATURES)
+    for length in range(1, MAX_SEQUENCE_LENGTH + 1):
+        if length not in batch_sizes:
+            await run_warm_up(sequence[:length])
+    model.timings_ms["warm_up_sequences"] = elapsed_ms(stage_start)
+
+
+# Predictions of recently seen poses, shared by every client.
+cache = PredictionCache(CACHE_SIZE, CACHE_GRID) if CACHE_SIZE > 0 else None
+
+# Previous frame and smoothed probabilities of each client token.
+sessions = SessionStore(SESSION_MAX_COUNT, SESSION_TTL_SECONDS, SESSION_DELTA_THRESHOLD,
+                        SESSION_SMOOTHING_ALPHA) if SESSION_MAX_COUNT > 0 else None
+
+
+def after_swap(model: LoadedModel):
+    """
+    Drop cached predictions of the previous model, and start new process workers since existing
+    ones hold a copy of it. Batches already running in them finish on that model.
+    """
+    if cache is not None:
+        cache.clear()
+    if executor.mode == "process":
+        executor.reset_pool()
+
+
+# Holds the model being served and swaps in new versions.
+registry = ModelRegistry(MODEL_BACKEND, MODEL_PRECISION, warm_up=warm_up, on_swap=after_swap)
+
+# Set by backend/serve.py before forking, so models loaded through the admin route reach every worker.
+reload_channel: ReloadChannel | None = None
+
+# Reloads started by the parent's signal, referenced until they finish.
+reload_tasks: set[asyncio.Task] = set()
+
+
+async def reload_published_model():
+    """
+    Load the model directory another worker loaded through the admin route. Failures are reported
+    and the current model is kept.
+    """
+    request = reload_channel.read()
+    if request is None or request["pid"] == os.getpid():
+        return
+    try:
+        await registry.load(request["model_dir"])
+    except Exception:
+        print(f"Could not load model {request['model_dir']} loaded by worker {request['pid']}:",
+              file=sys.stderr, flush=True)
+        traceback.print_exc()
+
+
+def listen_for_reloads():
+    """
+    Load the model published on the reload channel whenever the parent forwards its signal.
+    """
+    loop = asyncio.get_running_loop()
+
+    def on_signal():
+        task = loop.create_task(reload_published_model())
+        reload_tasks.add(task)
+        task.add_done_callback(reload_tasks.discard)
+
+    loop.add_signal_handler(reload_channel.signal_number(), on_signal)
+
+
+async def start_inference():
+    """
+    Load and warm up the model when the app starts, then watch its files for changes if enabled.
+    Workers forked by backend/serve.py already hold the model loaded by their parent, so they
+    only warm up their own executor, unless a model was loaded through the admin route since
+    the parent loaded its own, in which case they load that one. A failed load is reported and
+    left in /ready, and the watcher still starts so the model is loaded once its files are fixed.
+    """
+    published = None
+    if reload_channel is not None:
+        listen_for_reloads()
+        published = reload_channel.read()
+    try:
+        if published is not None:
+            await registry.load(published["model_dir"])
+        elif registry.active is None:
+            await registry.load()
+        else:
+            await warm_up(registry.active)
+            registry.mark_warmed()
+    except Exception:
+        print("Model failed to load at startup:", file=sys.stderr, flush=True)
+        traceback.print_exc()
+    if MODEL_WATCH_SECONDS > 0:
+        await registry.watch(MODEL_WATCH_SECONDS)
+
+
+def service_unavailable(exc: InferenceQueueFull) -> HTTPException:
+    """
+    Create the error returned when the inference queue has no room for a request.
     """
-    # Get start time of operation.
-    start_time = current_time_milli()
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="The prediction service is busy, please retry shortly",
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
+
+def check_model_loaded():
+    """
+    Refuse predictions while the model is still being loaded at startup.
+    """
+    if registry.active is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The model is still loading, please retry shortly",
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+
+def unprocessable(detail: str) -> HTTPException:
+    """
+    Create the error returned for landmark data that cannot be predicted.
+    """
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def frames_from_json(frames: list[list[float]], max_frames: int) -> np.ndarray:
+    """
+    Convert frames parsed from JSON into an (N, 63) float32 array, checking every frame's length
+    and that every value is finite, as the binary format does. Malformed frames are rejected here
+    so they can never break a batch shared with other requests.
+    """
+    if not 0 < len(frames) <= max_frames:
+        raise unprocessable(f"Expected between 1 and {max_frames} frames")
+    if any(len(frame) != LANDMARK_FEATURES for frame in frames):
+        raise unprocessable(f"Expected {LANDMARK_FEATURES} landmark values in every frame")
+
+    landmarks = np.array(frames, dtype=np.float32)
+    if not np.isfinite(landmarks).all():
+        raise unprocessable("Landmark values must be finite")
+    return landmarks
+
+
+async def read_landmark_frames(request: Request, model: type[LandmarkInput | LandmarkSequenceInput],
+                               max_frames: int) -> np.ndarray:
+    """
+    Read the frames of a prediction request as an (N, 63) float32 array. Requests sent with the
+    binary landmark content type are decoded without copying, anything else is validated as JSON.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type == LANDMARK_CONTENT_TYPE:
+        try:
+            return decode_landmark_frames(body, LANDMARK_FEATURES, max_frames)
+        except WireFormatError as exc:
+            raise unprocessable(str(exc))
+
+    try:
+        input_data = model.model_validate_json(body)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors(include_url=False), body=body)
+    return frames_from_json(input_data.to_frames(), max_frames)
+
+
+def landmark_request_body(model: type[BaseModel]) -> dict:
+    """
+    Get the OpenAPI request body for routes accepting a JSON model or the binary landmark format.
+    """
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": model.model_json_schema()},
+                LANDMARK_CONTENT_TYPE: {"schema": {"type": "string", "format": "binary"}},
+            }
+        }
+    }
+
+
+def cached_frame(normalized: np.ndarray) -> ModelOutput | None:
+    """
+    Get the prediction of every hand in a (k, 63) normalized frame from the cache, or None
+    unless all of them are cached.
+    """
+    version = registry.active.version
+    outputs = []
+    for row in normalized:
+        output = cache.get(row, version)
+        if output is None:
+            return None
+        outputs.append(output)
+
+    if len(outputs) == 1:
+        return outputs[0]
+    return ModelOutput(np.concatenate([output.probabilities for output in outputs]),
+                       outputs[0].label_classes, version)
+
+
+async def infer_frame(landmarks: np.ndarray, normalized: Optional[np.ndarray], timer: StageTimer) -> ModelOutput:
+    """
+    Predict a (k, 63) raw frame with one row per hand from the cache, looked up by its normalized
+    rows, or through the micro-batcher. The hands of a frame are submitted together, so they share
+    one forward pass.
+    """
+    output = cached_frame(normalized) if cache is not None else None
+    if cache is not None:
+        timer.mark("cache")
+    if output is None:
+        try:
+            output = await batcher.submit(landmarks)
+        except InferenceQueueFull as exc:
+            raise service_unavailable(exc)
+        timer.mark("inference")
+        if cache is not None:
+            for index, row in enumerate(normalized):
+                cache.put(row, output[index:index + 1])
+    return output
+
+
+async def run_prediction(landmarks: np.ndarray, current_user: Optional[User], timer: StageTimer,
+                         session: Optional[SessionState] = None) -> PredictionResult:
+    """
+    Predict a single (k, 63) frame of landmark data with one row per hand, and update the user's
+    predict count. With a session, frames that barely moved skip inference and results are smoothed
+    over time. Each stage is recorded in the timer. Shared by the HTTP and streaming predict routes.
+    """
     # This will be an average accuracy of the model over all predictions.
     accuracy = 1
 
-    input_np = np.array(input_data.landmarks)
-    normalized_landmarks = normalize_landmarks(input_np)
-    landmarks = np.array(normalized_landmarks).reshape(1, -1)
-    x_tensor = torch.tensor(landmarks, dtype=torch.float32).to(device)
+    check_model_loaded()
 
-    with torch.no_grad():
-        output = model(x_tensor)
-        prediction = torch.softmax(output, dim=1).cpu().numpy()[0]
+    # The cache and sessions compare normalized frames. Without them, the frame is only normalized
+    # by the batcher, straight into the model input.
+    normalized = None
+    if cache is not None or session is not None:
+        normalized = normalize_landmarks_batch(landmarks)
+        timer.mark("normalize")
+    if session is not None:
+        output = sessions.gate(session, normalized, registry.active.version)
+        timer.mark("session")
+        if output is None:
+            output = sessions.update(session, normalized, await infer_frame(landmarks, normalized, timer))
+    else:
+        output = await infer_frame(landmarks, normalized, timer)
 
-    top_class = label_classes[np.argmax(prediction)]
-    confidence = float(np.max(prediction))
+    hands = [HandPrediction(prediction=output.label_classes[np.argmax(probabilities)],
+                            confidence=float(np.max(probabilities)))
+             for probabilities in output.probabilities]
+
+    # Check if the confidence of any hand is over 80% and if the user is logged in, increment the predict count.
+    if max(hand.confidence for hand in hands) >= 0.80:
+        if current_user:
+            predict_counts.add(current_user.id)
+            timer.mark("database")
 
-    # Check if the confidence is over 80% and if the user is logged in, increment the predict count.
+    return PredictionResult(prediction=hands[0].prediction, confidence=hands[0].confidence,
+                            accuracy=accuracy, probabilities=[], inferenceTimeMs=round(timer.total_ns() / 1_000_000, 3),
+                            modelVersion=output.version, hands=hands)
+
+
+@router.post("/predict", openapi_extra=landmark_request_body(LandmarkInput))
+async def predict(request: Request,
+                  current_user: Optional[User] = Depends(get_current_user_optional),
+                  token: Optional[str] = Depends(get_current_token)) -> PredictionResult:
+    """
+    FastAPI route for receiving and predicting landmark data from the frontend.
+    Accepts a LandmarkInput JSON body or raw little-endian float32 values, with 63 values
+    for each of up to two hands.
+    When sessions are enabled, logged-in users get a session keyed by their access token.
+    """
+    timer = StageTimer()
+    landmarks = await read_landmark_frames(request, LandmarkInput, max_frames=MAX_HANDS)
+    timer.mark("parse")
+    session = sessions.get(token) if sessions is not None and current_user and token else None
+    result = await run_prediction(landmarks, current_user, timer, session)
+    request_metrics.observe_stages("/predict", timer)
+    return result
+
+
+@router.post("/predict/sequence", openapi_extra=landmark_request_body(LandmarkSequenceInput))
+async def predict_sequence(request: Request,
+                           current_user: Optional[User] = Depends(get_current_user_optional)) -> SequencePredictionResult:
+    """
+    FastAPI route for predicting a buffer of landmark frames in a single batched forward pass.
+    Accepts a LandmarkSequenceInput JSON body or the frames as raw little-endian float32 values.
+    The top result is taken from the mean of the per-frame probabilities.
+    """
+    timer = StageTimer()
+
+    frames = await read_landmark_frames(request, LandmarkSequenceInput, max_frames=MAX_SEQUENCE_LENGTH)
+    timer.mark("parse")
+    check_model_loaded()
+    try:
+        output = await executor.run(predict_batch, frames)
+    except InferenceQueueFull as exc:
+        raise service_unavailable(exc)
+    timer.mark("inference")
+
+    probabilities, label_classes = output.probabilities, output.label_classes
+
+    frame_classes = np.argmax(probabilities, axis=1)
+    frame_confidences = np.max(probabilities, axis=1)
+    mean_probabilities = probabilities.mean(axis=0)
+    confidence = float(np.max(mean_probabilities))
+    timer.mark("aggregate")
+
+    # The sequence counts as one prediction towards the user's predict count.
     if confidence >= 0.80:
         if current_user:
-            database_increment_predict_count(current_user.email)
+            predict_counts.add(current_user.id)
+            timer.mark("database")
+
+    request_metrics.observe_stages("/predict/sequence", timer)
+    return SequencePredictionResult(
+        prediction=label_classes[np.argmax(mean_probabilities)],
+        confidence=confidence,
+        frames=[FramePrediction(prediction=label_classes[index], confidence=float(frame_confidence))
+                for index, frame_confidence in zip(frame_classes, frame_confidences)],
+        inferenceTimeMs=round(timer.total_ns() / 1_000_000, 3),
+        modelVersion=output.version
+    )
+
+
+@router.websocket("/predict/stream")
+async def predict_stream(websocket: WebSocket, current_user: Optional[User] = Depends(get_websocket_user)):
+    """
+    FastAPI websocket route for streaming landmark frames and receiving a prediction for each.
+    The connection is authenticated once when it is opened. Each message is either a LandmarkInput
+    JSON text message or a binary message of 63 raw little-endian float32 values for each of up to
+    two hands, and is answered with a PredictionResult, or an error_code and error message. When
+    sessions are enabled, each connection gets its own session.
+    """
+    session = sessions.new() if sessions is not None else None
+    await websocket.accept()
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            break
+
+        timer = StageTimer()
+        try:
+            if message.get("bytes") is not None:
+                landmarks = decode_landmark_frames(message["bytes"], LANDMARK_FEATURES, max_frames=MAX_HANDS)
+            else:
+                input_data = LandmarkInput.model_validate_json(message["text"])
+                landmarks = frames_from_json(input_data.to_frames(), max_frames=MAX_HANDS)
+            timer.mark("parse")
+            result = await run_prediction(landmarks, current_user, timer, session)
+        except (ValidationError, WireFormatError) as exc:
+            await websocket.send_json({"error_code": status.HTTP_422_UNPROCESSABLE_ENTITY, "error": str(exc)})
+            continue
+        except HTTPException as exc:
+            await websocket.send_json({"error_code": exc.status_code, "error": exc.detail})
+            continue
+
+        await websocket.send_json(result.model_dump())
+        request_metrics.observe_stages("/predict/stream", timer)
+
+
+@router.get("/predict/stats")
+async def predict_stats():
+    """
+    FastAPI route for getting the statistics of the inference scheduler, executor, prediction cache,
+    sessions and pending predict counts of the worker that answered, identified by worker.
+    """
+    return {"worker": worker_labels(), "batcher": batcher.stats(), "executor": executor.stats(),
+            "cache": cache.stats() if cache is not None else None,
+            "sessions": sessions.stats() if sessions is not None else None,
+            "predict_counts": predict_counts.stats()}
+
+
+@router.get("/ready")
+async def readiness(response: Response):
+    """
+    FastAPI route reporting whether a model has been loaded and warmed up in this worker, with its
+    version and the time taken by each startup stage. Responds with 503 until the first model is ready.
+    """
+    model_status = registry.status()
+    ready = registry.ready
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {"ready": ready, "version": model_status["version"],
+            "timings_ms": model_status["timings_ms"], "error": model_status["error"]}
+
+
+@router.get("/predict/model", dependencies=[Depends(verify_admin_token)])
+async def model_status():
+    """
+    FastAPI admin route for getting the active model version and the state of the latest load.
+    """
+    return registry.status()
+
+
+@router.post("/predict/model", dependencies=[Depends(verify_admin_token)])
+async def load_model_version(input_data: ModelLoadInput):
+    """
+    FastAPI admin route for loading a model version from a subdirectory of model_versions_dir,
+    or reloading the default model directory when no version is given. The new model is loaded
+    and warmed up while the current one keeps serving, then swapped in. Under backend/serve.py the
+    other workers load the same directory in the background after this worker has loaded it.
+    """
+    model_dir = MODEL_DIR
+    if input_data.version is not None:
+        if input_data.version in ("", ".", "..") or os.path.basename(input_data.version) != input_data.version:
+            raise unprocessable("Invalid model version")
+        model_dir = os.path.join(MODEL_VERSIONS_DIR, input_data.version) + os.path.sep
 
-    end_time = current_time_milli() - start_time
-    return PredictionResult(prediction=top_class, confidence=confidence,
-                            accuracy=accuracy, probabilities=[], inferenceTimeMs=end_time)
+    try:
+        await registry.load(model_dir)
+    except Exception as exc:
+        raise unprocessable(f"Could not load model version: {exc}")
+    if reload_channel is not None:
+        reload_channel.publish(model_dir)
+    return registry.status()
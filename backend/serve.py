@@ -0,0 +1,255 @@
+"""
+Production server. Creates the database tables and loads and warms up the model once, then
+forks the configured number of uvicorn workers sharing one listening socket, so the model's
+memory pages are shared copy-on-write between workers instead of being loaded by each of them.
+Each worker gets its own torch thread budget so workers do not oversubscribe the CPU cores, and
+the memory use of every worker is reported periodically.
+
+Usage: python -m backend.serve
+"""
+import asyncio
+import gc
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+import traceback
+
+from backend.configs.config import get_config
+from backend.inference.reload_channel import ReloadChannel
+from backend.utils.process_memory import process_memory
+
+BIND_HOST = get_config().get("SERVER", "bind_host")
+PORT = int(get_config().get("HOST", "port"))
+WORKERS = max(1, int(get_config().get("SERVER", "workers")))
+TORCH_THREADS = int(get_config().get("SERVER", "torch_threads"))
+TORCH_INTEROP_THREADS = int(get_config().get("SERVER", "torch_interop_threads"))
+BACKLOG = int(get_config().get("SERVER", "backlog"))
+MEMORY_REPORT_SECONDS = float(get_config().get("SERVER", "memory_report_seconds"))
+
+# Delay after forking before the first memory report, so workers have finished starting up.
+FIRST_REPORT_DELAY_SECONDS = 10
+
+# Delay before replacing a worker that exited, so a worker failing at startup is not restarted in a busy loop.
+RESTART_DELAY_SECONDS = 1
+
+
+def thread_budget() -> int:
+    """
+    Get the number of intra-op threads each worker may use, splitting the cores between workers
+    unless torch_threads is set.
+    """
+    if TORCH_THREADS > 0:
+        return TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // WORKERS)
+
+
+def limit_threads(threads: int, interop_threads: int | None = None):
+    """
+    Limit the threads used by torch and by the OpenMP and BLAS pools of NumPy. The environment
+    variables only take effect for libraries loaded afterwards. The inter-op thread count can
+    only be set once per process, so it is left alone when None.
+    """
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[variable] = str(threads)
+
+    torch = sys.modules.get("torch")
+    if torch is None:
+        return
+    torch.set_num_threads(threads)
+    if interop_threads is not None:
+        try:
+            torch.set_num_interop_threads(interop_threads)
+        except RuntimeError:
+            # Only possible before inter-op work has started in this process.
+            pass
+
+
+def bind_socket() -> socket.socket:
+    """
+    Open the listening socket shared by every worker.
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in BIND_HOST else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((BIND_HOST, PORT))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+async def prepare_database():
+    """
+    Create and migrate the database tables once before forking, then close the connections so
+    no worker inherits one. Workers open their own on first use.
+    """
+    from backend.database.database import engine
+    from backend.database.migrations import init_database
+
+    upgraded = await init_database()
+    if upgraded:
+        print(f"Applied database migrations {upgraded}", flush=True)
+    await engine.dispose()
+
+
+def preload_model():
+    """
+    Load and warm up the model in the parent process. Warm-up runs single threaded, as OpenMP
+    thread pools started before forking are not safe to use in the children. The executor is
+    shut down afterwards so every worker starts its own worker threads.
+    """
+    from backend.routers import predict
+
+    limit_threads(1)
+    asyncio.run(predict.registry.load())
+    predict.executor.shutdown()
+    print(f"Loaded model {predict.registry.active.version} in "
+          f"{predict.registry.active.timings_ms['total']:.1f} ms", flush=True)
+
+
+def run_worker(app, sock: socket.socket, index: int):
+    """
+    Serve requests in a forked worker until it is told to stop.
+    """
+    import uvicorn
+    from backend.inference import metrics
+
+    metrics.worker_index = index
+    limit_threads(thread_budget(), TORCH_INTEROP_THREADS)
+    print(f"Worker {index} (pid {os.getpid()}) using {thread_budget()} torch threads", flush=True)
+
+    config = uvicorn.Config(app, lifespan="on", proxy_headers=True)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket, index: int) -> int:
+    """
+    Fork a worker process and return its pid.
+    """
+    pid = os.fork()
+    if pid == 0:
+        # Never return into the parent's supervision loop from a worker.
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            # Ignore reload signals until the worker's event loop handles them.
+            signal.signal(ReloadChannel.signal_number(), signal.SIG_IGN)
+            run_worker(app, sock, index)
+        except SystemExit as exc:
+            exit_code = exc.code if isinstance(exc.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            exit_code = 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(exit_code)
+    return pid
+
+
+def report_memory(workers: dict[int, int]):
+    """
+    Print the memory use of the parent and every worker. The total pss is the memory actually
+    used by all of them together, which is far below the sum of rss when model pages are shared.
+    """
+    parent = process_memory()
+    if parent is None:
+        print("Memory report unavailable, /proc/<pid>/smaps_rollup cannot be read", flush=True)
+        return
+
+    rows = [("parent", os.getpid(), parent)]
+    for pid, index in sorted(workers.items(), key=lambda worker: worker[1]):
+        rows.append((f"worker {index}", pid, process_memory(pid)))
+
+    mib = 1024 * 1024
+    total_rss = total_pss = 0
+    for name, pid, memory in rows:
+        if memory is None:
+            continue
+        total_rss += memory["rss"]
+        total_pss += memory["pss"]
+        print(f"  {name:<10} pid={pid:<8} rss={memory['rss'] / mib:8.1f}MiB pss={memory['pss'] / mib:8.1f}MiB "
+              f"shared={memory['shared'] / mib:8.1f}MiB private={memory['private'] / mib:8.1f}MiB", flush=True)
+    print(f"  total      rss={total_rss / mib:.1f}MiB pss={total_pss / mib:.1f}MiB", flush=True)
+
+
+def serve():
+    """
+    Preload the model, fork the workers and supervise them, replacing any worker that exits
+    unexpectedly until the server is told to stop. A reload signal from a worker that loaded a
+    model through the admin route is forwarded to every worker.
+    """
+    if not hasattr(os, "fork"):
+        # Forking is unavailable (e.g. on Windows), fall back to a single server process.
+        import uvicorn
+        from backend.main import app
+        uvicorn.run(app, host=BIND_HOST, port=PORT)
+        return
+
+    # Set before torch and NumPy are imported, so their thread pools are sized for one worker.
+    limit_threads(thread_budget())
+    from backend.main import app
+    asyncio.run(prepare_database())
+    preload_model()
+
+    from backend.routers import predict
+    reload_fd, reload_path = tempfile.mkstemp(prefix="asl-model-reload-")
+    os.close(reload_fd)
+    predict.reload_channel = ReloadChannel(reload_path)
+
+    sock = bind_socket()
+    print(f"Listening on {BIND_HOST}:{PORT} with {WORKERS} workers", flush=True)
+
+    # Keep the objects created so far out of garbage collection, which would otherwise write
+    # to their pages and copy them into every worker.
+    gc.freeze()
+
+    workers: dict[int, int] = {}
+    stopping = False
+
+    def signal_workers(signum: int):
+        for pid in list(workers):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        signal_workers(signal.SIGTERM)
+
+    def forward_reload(signum, frame):
+        signal_workers(signum)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(ReloadChannel.signal_number(), forward_reload)
+
+    for index in range(WORKERS):
+        workers[spawn_worker(app, sock, index)] = index
+
+    next_report = time.monotonic() + FIRST_REPORT_DELAY_SECONDS
+    while workers:
+        pid, status = os.waitpid(-1, os.WNOHANG)
+        if pid == 0:
+            if MEMORY_REPORT_SECONDS > 0 and not stopping and time.monotonic() >= next_report:
+                report_memory(workers)
+                next_report = time.monotonic() + MEMORY_REPORT_SECONDS
+            time.sleep(0.5)
+            continue
+
+        index = workers.pop(pid, None)
+        if index is not None and not stopping:
+            print(f"Worker {index} (pid {pid}) exited with status {status}, restarting", flush=True)
+            time.sleep(RESTART_DELAY_SECONDS)
+            workers[spawn_worker(app, sock, index)] = index
+
+    sock.close()
+    os.remove(reload_path)
+
+
+if __name__ == "__main__":
+    serve()
@@ -1,6 +1,8 @@
 import sys
 from unittest.mock import MagicMock
 
+import pytest
+
 # --- PyTorch ---
 mock_torch = MagicMock()
 
@@ -14,6 +16,7 @@ mock_torch.device = MagicMock()
 mock_torch.manual_seed = MagicMock()
 
 sys.modules["torch"] = mock_torch
+sys.modules["torch.nn"] = mock_torch.nn
 
 # --- Kaggle API ---
 mock_kaggle_api = MagicMock()
@@ -39,3 +42,38 @@ mock_mediapipe.solutions.hands = MagicMock()
 mock_mediapipe.solutions.hands.Hands.return_value.process.return_value = MagicMock()
 sys.modules["mediapipe"] = mock_mediapipe
 
+
+
+@pytest.fixture
+def test_engine(tmp_path):
+    """
+    Create an async engine with the configured pool and pragmas on an empty database file with every table.
+    """
+    from sqlmodel import SQLModel, create_engine
+    from backend.database.database import create_database_engine
+
+    path = tmp_path / "test.db"
+    SQLModel.metadata.create_all(create_engine(f"sqlite:///{path}"))
+    return create_database_engine(f"sqlite+aiosqlite:///{path}")
+
+
+@pytest.fixture
+def app_sessions(test_engine):
+    """
+    Make the app's routes use sessions on the test database, and return the list of sessions
+    opened so tests can count them. The override is removed afterwards.
+    """
+    from sqlmodel.ext.asyncio.session import AsyncSession
+    from backend.database.database import get_session
+    from backend.main import app
+
+    opened = []
+
+    async def override_session():
+        async with AsyncSession(test_engine, expire_on_commit=False) as session:
+            opened.append(session)
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    yield opened
+    app.dependency_overrides.pop(get_session, None)
@@ -0,0 +1,197 @@
+"""
+Unit tests for the database query helpers and the predict count accumulator.
+"""
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from backend.database.database import User, create_database_engine, sqlite_pragmas
+from backend.database.migrations import MIGRATIONS, init_database
+from backend.database.predict_counter import PredictCounter
+from backend.database.user_queries import database_add_predict_counts
+
+
+async def add_user(engine, username: str, total_predictions: int = 0) -> int:
+    """
+    Add a user to the test database and return its id.
+    """
+    async with AsyncSession(engine) as session:
+        user = User(username=username, email=f"{username}@example.com", password_hashed="hash",
+                    total_predictions=total_predictions, created_at=datetime.now(timezone.utc),
+                    last_login=datetime.now(timezone.utc))
+        session.add(user)
+        await session.commit()
+        await session.refresh(user)
+        return user.id
+
+
+@pytest.mark.asyncio
+async def test_add_predict_counts(test_engine):
+    """
+    Ensures a batch of counts is added to the stored count of each user.
+    """
+    first = await add_user(test_engine, "first", total_predictions=5)
+    second = await add_user(test_engine, "second")
+
+    with patch("backend.database.user_queries.engine", test_engine):
+        await database_add_predict_counts({first: 3, second: 1})
+
+    async with AsyncSession(test_engine) as session:
+        assert (await session.get(User, first)).total_predictions == 8
+        assert (await session.get(User, second)).total_predictions == 1
+
+
+@pytest.mark.asyncio
+async def test_predict_counter_batches_writes():
+    """
+    Ensures counts are accumulated per user, written in one batch and kept for retry when a write fails.
+    """
+    write = AsyncMock()
+    counter = PredictCounter(write, interval_seconds=1)
+    for user_id in (1, 1, 2, 1):
+        counter.add(user_id)
+    assert counter.pending(1) == 3
+
+    await counter.flush()
+    write.assert_awaited_once_with({1: 3, 2: 1})
+    assert counter.pending(1) == 0
+
+    # Nothing is written when no predictions were counted.
+    await counter.flush()
+    assert write.call_count == 1
+
+    write.side_effect = OSError("database is locked")
+    counter.add(2)
+    with pytest.raises(OSError):
+        await counter.flush()
+    assert counter.pending(2) == 1
+    assert counter.stats()["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_predict_counter_stops_after_write():
+    """
+    Stops the background writer in the middle of a write and expects the write to finish and the
+    final flush to write nothing twice.
+    """
+    started = asyncio.Event()
+    release = asyncio.Event()
+    written = []
+
+    async def slow_write(counts):
+        started.set()
+        await release.wait()
+        written.append(dict(counts))
+
+    counter = PredictCounter(slow_write, interval_seconds=0.01)
+    counter.add(1, 2)
+    stop = asyncio.Event()
+    writer = asyncio.create_task(counter.run(stop))
+    await started.wait()
+    stop.set()
+    release.set()
+    await writer
+
+    await counter.flush()
+    assert written == [{1: 2}]
+    assert counter.pending(1) == 0
+    assert counter.stats()["flushes"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_pragmas(test_engine):
+    """
+    Ensures SQLite connections are opened in WAL mode with the configured busy timeout, and
+    unknown settings are rejected.
+    """
+    async with test_engine.connect() as connection:
+        assert (await connection.execute(text("PRAGMA journal_mode"))).scalar() == "wal"
+        assert (await connection.execute(text("PRAGMA busy_timeout"))).scalar() == 5000
+
+    with pytest.raises(ValueError):
+        sqlite_pragmas("wal; DROP TABLE user", "normal", 5000, 0)
+
+
+# The user table as created before usernames and emails were indexed.
+OLD_USER_TABLE = """
+CREATE TABLE user (
+    id INTEGER NOT NULL PRIMARY KEY, username VARCHAR(50) NOT NULL, email VARCHAR(50) NOT NULL,
+    password_hashed VARCHAR(50) NOT NULL, total_predictions INTEGER NOT NULL, is_active BOOLEAN NOT NULL,
+    created_at DATETIME, last_login DATETIME
+)
+"""
+
+# The prediction history table as created before it was indexed by user.
+OLD_HISTORY_TABLE = """
+CREATE TABLE predictionhistory (
+    id INTEGER NOT NULL PRIMARY KEY, user_id INTEGER REFERENCES user (id), content VARCHAR(1000) NOT NULL,
+    created_at DATETIME
+)
+"""
+
+
+async def old_database(tmp_path, usernames: list[str]):
+    """
+    Create a database with the old user table holding the given users.
+    """
+    engine = create_database_engine(f"sqlite+aiosqlite:///{tmp_path / 'old.db'}")
+    async with engine.begin() as connection:
+        await connection.execute(text(OLD_USER_TABLE))
+        for index, username in enumerate(usernames):
+            await connection.execute(text(
+                "INSERT INTO user (username, email, password_hashed, total_predictions, is_active) "
+                "VALUES (:username, :email, 'hash', 0, 1)"), {"username": username, "email": f"user{index}@example.com"})
+    return engine
+
+
+@pytest.mark.asyncio
+async def test_migrations_upgrade_existing_database(tmp_path):
+    """
+    Ensures an existing database gets the unique user indexes, and migrations run only once.
+    """
+    engine = await old_database(tmp_path, ["first", "second"])
+
+    assert await init_database(engine) == [migration.version for migration in MIGRATIONS]
+    assert await init_database(engine) == []
+
+    async with engine.connect() as connection:
+        indexes = await connection.run_sync(lambda sync: inspect(sync).get_indexes("user"))
+    unique_columns = {tuple(index["column_names"]) for index in indexes if index["unique"]}
+    assert {("username",), ("email",)} <= unique_columns
+
+
+@pytest.mark.asyncio
+async def test_migrations_refuse_duplicate_users(tmp_path):
+    """
+    Ensures duplicate usernames stop the migration and leave the database unchanged.
+    """
+    engine = await old_database(tmp_path, ["same", "same"])
+
+    with pytest.raises(RuntimeError, match="duplicate"):
+        await init_database(engine)
+
+    async with engine.connect() as connection:
+        tables = await connection.run_sync(lambda sync: inspect(sync).get_table_names())
+    assert "schema_migrations" not in tables
+
+
+@pytest.mark.asyncio
+async def test_migrations_backfill_history_count(tmp_path):
+    """
+    Ensures the history count column is added to an existing database and filled from the history.
+    """
+    engine = await old_database(tmp_path, ["first", "second", "third"])
+    async with engine.begin() as connection:
+        await connection.execute(text(OLD_HISTORY_TABLE))
+        for user_id in (1, 1, 1, 2):
+            await connection.execute(text("INSERT INTO predictionhistory (user_id, content) VALUES (:user_id, 'HI')"),
+                                     {"user_id": user_id})
+
+    await init_database(engine)
+
+    async with AsyncSession(engine) as session:
+        assert [(await session.get(User, user_id)).history_count for user_id in (1, 2, 3)] == [3, 1, 0]
@@ -0,0 +1,222 @@
+"""
+Unit tests for the inference scheduling modules in backend.inference.
+"""
+import asyncio
+import os
+import threading
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from backend.inference.batcher import MicroBatcher
+from backend.inference.cache import PredictionCache
+from backend.inference.executor import InferenceExecutor, InferenceQueueFull
+from backend.inference.reload_channel import ReloadChannel
+from backend.inference.registry import ModelOutput
+from backend.inference.sessions import SessionStore
+
+
+@pytest.mark.asyncio
+async def test_batcher_combines_concurrent_requests():
+    """
+    Ensures concurrent submissions share a single forward pass and each caller gets its own rows.
+    """
+    calls = []
+
+    def forward(batch):
+        calls.append(batch.shape[0])
+        return batch * 2
+
+    batcher = MicroBatcher(forward, max_batch_size=8, max_wait_us=50000)
+    rows = [np.full((1, 3), i, dtype=np.float32) for i in range(4)]
+
+    results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+
+    assert calls == [4]
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full((1, 3), i * 2))
+    assert batcher.stats()["batch_size"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_batcher_respects_max_batch_size():
+    """
+    Ensures batches never exceed the maximum size and grouped rows stay in the same batch.
+    """
+    calls = []
+
+    def forward(batch):
+        calls.append(batch.shape[0])
+        return batch
+
+    batcher = MicroBatcher(forward, max_batch_size=4, max_wait_us=50000)
+    submissions = [np.zeros((3, 2)), np.zeros((2, 2)), np.zeros((1, 2))]
+
+    results = await asyncio.gather(*(batcher.submit(rows) for rows in submissions))
+
+    assert calls == [3, 3]
+    assert [len(result) for result in results] == [3, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_batcher_propagates_forward_errors():
+    """
+    Ensures every caller in a failed batch receives the forward exception.
+    """
+    def forward(batch):
+        raise RuntimeError("forward failed")
+
+    batcher = MicroBatcher(forward, max_batch_size=4, max_wait_us=1000)
+
+    with pytest.raises(RuntimeError):
+        await batcher.submit(np.zeros((1, 2)))
+
+
+@pytest.mark.asyncio
+async def test_batcher_prepares_rows_into_reused_buffer():
+    """
+    Ensures prepare writes each request's rows into one input buffer that is reused by the next batch.
+    """
+    buffers = []
+
+    def prepare(rows, out):
+        np.multiply(rows, 10, out=out)
+
+    def forward(batch):
+        buffers.append(batch.base)
+        return batch.copy()
+
+    batcher = MicroBatcher(forward, max_batch_size=4, max_wait_us=50000, prepare=prepare)
+    rows = [np.full((1, 3), i, dtype=np.float32) for i in range(3)]
+
+    results = await asyncio.gather(*(batcher.submit(row) for row in rows))
+    again = await batcher.submit(np.ones((2, 3), dtype=np.float32))
+
+    for i, result in enumerate(results):
+        np.testing.assert_array_equal(result, np.full((1, 3), i * 10))
+    np.testing.assert_array_equal(again, np.full((2, 3), 10))
+    assert buffers[0] is buffers[1]
+    assert buffers[0].shape == (4, 3) and buffers[0].dtype == np.float32
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_queue_full():
+    """
+    Ensures work submitted to a full executor fails fast and is counted as rejected.
+    """
+    release = threading.Event()
+    executor = InferenceExecutor(workers=1, max_queue_size=1, retry_after=3)
+
+    running = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(InferenceQueueFull) as exc_info:
+        await executor.run(lambda: None)
+
+    release.set()
+    assert await running is True
+    assert exc_info.value.retry_after == 3
+    assert executor.stats()["rejected"] == 1
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batcher_runs_forward_on_executor():
+    """
+    Ensures the batcher runs its forward in the executor's worker threads.
+    """
+    thread_names = []
+
+    def forward(batch):
+        thread_names.append(threading.current_thread().name)
+        return batch
+
+    executor = InferenceExecutor(workers=1)
+    batcher = MicroBatcher(forward, max_batch_size=4, max_wait_us=1000, executor=executor)
+
+    await batcher.submit(np.zeros((1, 2)))
+
+    assert thread_names[0].startswith("inference")
+    executor.shutdown()
+
+
+def test_prediction_cache_quantization_and_eviction():
+    """
+    Ensures rows on the same grid cell share an entry, versions are kept apart and the least
+    recently used entry is evicted when the cache is full.
+    """
+    cache = PredictionCache(max_size=2, grid=0.01)
+    labels = np.array(["A", "B"])
+    row = np.full(63, 0.5, dtype=np.float32)
+    other = np.full(63, -0.5, dtype=np.float32)
+
+    cache.put(row, ModelOutput(np.array([[0.9, 0.1]]), labels, "v1"))
+    assert cache.get(row + 0.001, "v1") is not None
+    assert cache.get(row, "v2") is None
+
+    cache.put(other, ModelOutput(np.array([[0.2, 0.8]]), labels, "v1"))
+    cache.get(row, "v1")
+    cache.put(row + 0.1, ModelOutput(np.array([[0.5, 0.5]]), labels, "v1"))
+
+    assert cache.get(other, "v1") is None
+    assert cache.get(row, "v1").probabilities[0, 0] == 0.9
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert (stats["hits"], stats["misses"]) == (3, 2)
+
+    # Entries own their probabilities rather than viewing the batch output they came from.
+    batch = ModelOutput(np.array([[0.3, 0.7], [0.6, 0.4]]), labels, "v1")
+    cache.put(other, batch[0:1])
+    assert cache.get(other, "v1").probabilities.base is None
+
+
+def test_session_gating_and_smoothing():
+    """
+    Ensures frames within the delta threshold skip inference, results are smoothed with an
+    exponential moving average and the least recently used session is evicted.
+    """
+    store = SessionStore(max_sessions=1, delta_threshold=0.05, alpha=0.5)
+    labels = np.array(["A", "B"])
+    state = store.get("token")
+    row = np.zeros((1, 63), dtype=np.float32)
+
+    assert store.gate(state, row, "v1") is None
+    batch = ModelOutput(np.array([[1.0, 0.0], [0.0, 1.0]]), labels, "v1")
+    first = store.update(state, row, batch[0:1])
+    np.testing.assert_allclose(first.probabilities, [[1.0, 0.0]])
+    assert state.probabilities.base is None and state.smoothed.base is None
+
+    assert store.gate(state, row + 0.01, "v1") is not None
+    assert store.gate(state, row + 0.1, "v1") is None
+    assert store.gate(state, row, "v2") is None
+
+    second = store.update(state, row + 0.1, ModelOutput(np.array([[0.0, 1.0]]), labels, "v1"))
+    np.testing.assert_allclose(second.probabilities, [[0.5, 0.5]])
+    held = store.gate(state, row + 0.1, "v1")
+    np.testing.assert_allclose(held.probabilities, [[0.25, 0.75]])
+
+    # A frame with a different number of hands always goes through the model.
+    assert store.gate(state, np.zeros((2, 63), dtype=np.float32), "v1") is None
+
+    assert store.get("other").landmarks is None
+    assert store.get("token").landmarks is None
+    assert store.stats()["evictions"] == 2
+
+
+def test_reload_channel_publishes_to_parent(tmp_path):
+    """
+    Ensures a published model directory is read back with the publishing pid and the parent is signalled.
+    """
+    channel = ReloadChannel(str(tmp_path / "reload"))
+    (tmp_path / "reload").write_text("")
+    assert channel.read() is None
+
+    with patch("backend.inference.reload_channel.os.kill") as kill:
+        channel.publish("backend/model/versions/v2/")
+
+    kill.assert_called_once_with(os.getppid(), ReloadChannel.signal_number())
+    assert channel.read() == {"model_dir": "backend/model/versions/v2/", "pid": os.getpid()}
+    assert os.listdir(tmp_path) == ["reload"]
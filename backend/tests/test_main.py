@@ -2,30 +2,37 @@
 Unit tests for FastAPI routes defined in main.py.
 Mocks TensorFlow model prediction and label classes.
 """
-from unittest.mock import patch
-from unittest.mock import MagicMock
+import os
+import re
+from unittest.mock import MagicMock, patch
+import numpy as np
 import pytest
+from fastapi.testclient import TestClient
+from fastapi.websockets import WebSocketDisconnect
 from httpx import AsyncClient, ASGITransport
+from backend.inference.executor import InferenceQueueFull
+from backend.inference.loader import LoadedModel
 from backend.main import app
 
 
 # sys.modules["tensorflow"] = MagicMock()
 
 
+def mock_model() -> LoadedModel:
+    """
+    Create a loaded model with a mocked engine and three label classes.
+    """
+    return LoadedModel(engine=MagicMock(), label_classes=np.array(["A", "B", "C"]), version="test")
+
+
 @pytest.mark.asyncio
-@patch("backend.main.model")
-@patch("backend.main.label_classes", ["A", "B", "C"])
-@patch("backend.main.torch.softmax")
-async def test_predict_success(mock_softmax, mock_model):
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_success(mock_model):
     """
     Sends a valid landmark list and verifies the response structure and values.
     """
     # Mock model prediction output
-    # mock_model.predict.return_value = [[0.1, 0.8, 0.1]]  # Class 'B'
-
-    mock_output = MagicMock()
-    mock_model.return_value = mock_output
-    mock_softmax.return_value.tolist.return_value = [[0.1, 0.8, 0.1]]
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
 
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url="http://test") as ac:
@@ -48,3 +55,464 @@ async def test_predict_invalid_input():
         response = await ac.post("/api/predict", json={"invalid_key": [1.0, 2.0]})
 
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+@patch("backend.routers.predict.batcher.submit", side_effect=InferenceQueueFull(retry_after=2))
+async def test_predict_queue_full(mock_submit, mock_model):
+    """
+    Sends a request while the inference queue is full and expects a 503 with Retry-After.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict", json={"landmarks": [0.0] * 63})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+
+
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+def test_predict_stream(mock_model):
+    """
+    Streams frames over the websocket and verifies a prediction or error is sent back for each.
+    """
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+
+    with TestClient(app).websocket_connect("/api/predict/stream") as websocket:
+        websocket.send_json({"landmarks": [0.0] * 63})
+        assert websocket.receive_json()["prediction"] == "B"
+
+        websocket.send_json({"landmarks": [0.0] * 10})
+        assert websocket.receive_json()["error_code"] == 422
+
+        websocket.send_bytes(np.zeros(63, dtype="<f4").tobytes())
+        assert websocket.receive_json()["prediction"] == "B"
+
+
+def test_predict_stream_invalid_token():
+    """
+    Opens the websocket with an invalid token and expects the connection to be refused.
+    """
+    with pytest.raises(WebSocketDisconnect) as exc_info:
+        with TestClient(app).websocket_connect("/api/predict/stream?token=invalid"):
+            pass
+
+    assert exc_info.value.code == 1008
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_sequence(mock_model):
+    """
+    Sends a buffer of frames and verifies per-frame predictions and the aggregated result.
+    """
+    mock_model.engine.predict_proba.return_value = np.array(
+        [[0.1, 0.8, 0.1], [0.1, 0.8, 0.1], [0.7, 0.2, 0.1]])
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict/sequence", json={"landmarks": [[0.0] * 63] * 3})
+
+    assert response.status_code == 200
+    json_data = response.json()
+    assert json_data["prediction"] == "B"
+    assert [frame["prediction"] for frame in json_data["frames"]] == ["B", "B", "A"]
+
+
+@pytest.mark.asyncio
+async def test_predict_sequence_invalid_frame():
+    """
+    Sends a buffer containing a frame of the wrong length and expects a 422 validation error.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict/sequence", json={"landmarks": [[0.0] * 63, [0.0] * 5]})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_binary(mock_model):
+    """
+    Sends a frame as raw little-endian float32 values and verifies the prediction.
+    """
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict", content=np.zeros(63, dtype="<f4").tobytes(),
+                                 headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 200
+    assert response.json()["prediction"] == "B"
+
+
+@pytest.mark.asyncio
+async def test_predict_binary_invalid_length():
+    """
+    Sends a binary payload that is not a whole frame and expects a 422 validation error.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict", content=np.zeros(62, dtype="<f4").tobytes(),
+                                 headers={"Content-Type": "application/octet-stream"})
+
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_non_finite_landmarks(mock_model):
+    """
+    Sends NaN and infinite landmark values as JSON and expects the same 422 error as the binary format.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        for value in ("NaN", "Infinity", "-Infinity"):
+            body = '{"landmarks": [' + ", ".join([value] + ["0.0"] * 62) + ']}'
+            response = await ac.post("/api/predict", content=body, headers={"Content-Type": "application/json"})
+            assert response.status_code == 422
+            assert response.json()["detail"] == "Landmark values must be finite"
+
+    mock_model.engine.predict_proba.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_two_hands(mock_model):
+    """
+    Sends the landmarks of two hands and expects both in one forward pass with a prediction per hand.
+    """
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1], [0.7, 0.2, 0.1]])
+    hands = np.random.default_rng(0).uniform(0, 1, (2, 63))
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/predict", json={"landmarks": hands.ravel().tolist()})
+        binary = await ac.post("/api/predict", content=hands.astype("<f4").tobytes(),
+                               headers={"Content-Type": "application/octet-stream"})
+        three_hands = await ac.post("/api/predict", json={"landmarks": [0.0] * 63 * 3})
+
+    assert response.status_code == binary.status_code == 200
+    json_data = response.json()
+    assert json_data["prediction"] == "B"
+    assert [hand["prediction"] for hand in json_data["hands"]] == ["B", "A"]
+    assert [hand["prediction"] for hand in binary.json()["hands"]] == ["B", "A"]
+    assert mock_model.engine.predict_proba.call_count == 2
+    assert mock_model.engine.predict_proba.call_args[0][0].shape == (2, 63)
+    assert three_hands.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_ready_after_warm_up(monkeypatch):
+    """
+    Expects /ready and /predict to return 503 before startup, then runs startup with a mocked
+    model and expects /ready to report the version and every stage timing.
+    """
+    from backend.routers import predict
+
+    model = mock_model()
+    model.engine.predict_proba.side_effect = lambda batch: np.full((len(batch), 3), 1 / 3)
+    model.timings_ms = {"load_engine": 1.0, "load_labels": 1.0}
+    monkeypatch.setattr("backend.inference.registry.load_model", lambda backend, precision, model_dir: model)
+    monkeypatch.setattr(predict.registry, "active", None)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/api/ready")).status_code == 503
+        assert (await ac.post("/api/predict", json={"landmarks": [0.0] * 63})).status_code == 503
+
+        await predict.start_inference()
+        response = await ac.get("/api/ready")
+
+    assert response.status_code == 200
+    assert response.json()["version"] == "test"
+    timings = response.json()["timings_ms"]
+    assert {"load_engine", "load_labels", "warm_up_batch_1", "warm_up_sequences", "total"} <= timings.keys()
+    assert f"warm_up_batch_{predict.MAX_BATCH_SIZE}" in timings
+    assert predict.registry.ready
+    warmed_sizes = {len(call.args[0]) for call in model.engine.predict_proba.call_args_list}
+    assert predict.MAX_BATCH_SIZE in warmed_sizes
+    assert set(range(1, predict.MAX_SEQUENCE_LENGTH + 1)) <= warmed_sizes
+
+
+@pytest.mark.asyncio
+async def test_ready_after_worker_warm_up(monkeypatch):
+    """
+    Gives the registry a model warmed up in another process, as a forked worker inherits it, and
+    expects /ready to return 503 until startup has warmed it up in this process.
+    """
+    from backend.routers import predict
+
+    model = mock_model()
+    model.engine.predict_proba.side_effect = lambda batch: np.full((len(batch), 3), 1 / 3)
+    monkeypatch.setattr(predict.registry, "active", model)
+    monkeypatch.setattr(predict.registry, "_warmed_pid", os.getpid() + 1)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.get("/api/ready")).status_code == 503
+        await predict.start_inference()
+        assert (await ac.get("/api/ready")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_startup_load_failure(monkeypatch):
+    """
+    Fails the model load at startup and expects it to be reported by /ready rather than raised.
+    """
+    from backend.routers import predict
+
+    def fail_load(backend, precision, model_dir):
+        raise FileNotFoundError(model_dir)
+
+    monkeypatch.setattr("backend.inference.registry.load_model", fail_load)
+    monkeypatch.setattr(predict.registry, "active", None)
+    monkeypatch.setattr(predict.registry, "last_error", None)
+
+    await predict.start_inference()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/ready")
+
+    assert response.status_code == 503
+    assert response.json()["error"].startswith("FileNotFoundError")
+
+
+@pytest.mark.asyncio
+async def test_model_hot_swap(monkeypatch, tmp_path):
+    """
+    Loads a new model version through the admin route and expects predictions to report it,
+    while a failed load or a missing admin token keeps the active model.
+    """
+    from backend.routers import predict
+    from backend.utils.auth.auth import ADMIN_TOKEN
+
+    def load_version(backend, precision, model_dir):
+        if "missing" in model_dir:
+            raise FileNotFoundError(model_dir)
+        model = mock_model()
+        model.version = os.path.basename(os.path.normpath(model_dir))
+        model.engine.predict_proba.side_effect = lambda batch: np.tile([0.1, 0.8, 0.1], (len(batch), 1))
+        return model
+
+    monkeypatch.setattr("backend.inference.registry.load_model", load_version)
+    monkeypatch.setattr(predict, "MODEL_VERSIONS_DIR", str(tmp_path))
+    monkeypatch.setattr(predict.registry, "active", mock_model())
+    monkeypatch.setattr(predict.registry, "last_error", None)
+    headers = {"X-Admin-Token": ADMIN_TOKEN}
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        assert (await ac.post("/api/predict/model", json={"version": "v2"})).status_code == 403
+        assert (await ac.post("/api/predict/model", json={"version": "../v2"}, headers=headers)).status_code == 422
+
+        response = await ac.post("/api/predict/model", json={"version": "v2"}, headers=headers)
+        assert response.status_code == 200
+        assert response.json()["version"] == "v2"
+
+        response = await ac.post("/api/predict/model", json={"version": "missing"}, headers=headers)
+        assert response.status_code == 422
+
+        response = await ac.post("/api/predict", json={"landmarks": [0.0] * 63})
+
+    assert response.json()["modelVersion"] == "v2"
+    assert predict.registry.last_error.startswith("FileNotFoundError")
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_predict_cache_skips_inference(mock_model):
+    """
+    Sends the same pose twice with the cache enabled and expects a single forward pass.
+    """
+    from backend.inference.cache import PredictionCache
+
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+    landmarks = np.random.default_rng(0).uniform(0, 1, 63).tolist()
+
+    with patch("backend.routers.predict.cache", PredictionCache(max_size=8, grid=0.01)) as cache:
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            first = await ac.post("/api/predict", json={"landmarks": landmarks})
+            second = await ac.post("/api/predict", json={"landmarks": landmarks})
+
+    assert first.json()["prediction"] == second.json()["prediction"] == "B"
+    assert mock_model.engine.predict_proba.call_count == 1
+    assert cache.stats()["hits"] == 1
+
+
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+def test_predict_stream_session_gating(mock_model):
+    """
+    Streams a held pose with sessions enabled and expects only the first frame to run inference.
+    """
+    from backend.inference.sessions import SessionStore
+
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+    landmarks = np.random.default_rng(0).uniform(0, 1, 63)
+
+    with patch("backend.routers.predict.sessions", SessionStore(max_sessions=8, delta_threshold=0.05)):
+        with TestClient(app).websocket_connect("/api/predict/stream") as websocket:
+            for offset in (0.0, 0.001, 0.002):
+                websocket.send_json({"landmarks": (landmarks + offset).tolist()})
+                assert websocket.receive_json()["prediction"] == "B"
+
+    assert mock_model.engine.predict_proba.call_count == 1
+
+
+@pytest.mark.asyncio
+@patch("backend.routers.predict.registry.active", new_callable=mock_model)
+async def test_metrics_endpoint(mock_model):
+    """
+    Sends a prediction and expects the request count, stage latencies and model version on /metrics.
+    """
+    mock_model.engine.predict_proba.return_value = np.array([[0.1, 0.8, 0.1]])
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        prediction = await ac.post("/api/predict", json={"landmarks": [0.0] * 63})
+        response = await ac.get("/api/metrics")
+
+    assert isinstance(prediction.json()["inferenceTimeMs"], float)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    # Every series is labelled with the worker that answered the scrape.
+    worker = f'worker="0",pid="{os.getpid()}"'
+    # Route templates include the router prefix on FastAPI versions that flatten included routers.
+    assert re.search(r'asl_http_requests_total\{method="POST",route="(/api)?/predict",status="200",'
+                     + worker + r'\} \d+', body)
+    assert f'asl_predict_stage_duration_microseconds_count{{route="/predict",stage="inference",{worker}}}' in body
+    assert f'asl_predict_stage_duration_microseconds_bucket{{route="/predict",stage="parse",{worker},le="+Inf"}}' in body
+    assert f'asl_model_info{{version="test",backend="torch",precision="float32",{worker}}} 1' in body
+
+
+@pytest.mark.asyncio
+async def test_predict_releases_connection(app_sessions, test_engine):
+    """
+    Predicts as a logged-in user and expects no database connection to be checked out while the
+    forward pass runs.
+    """
+    from backend.routers import predict
+
+    checked_out = []
+
+    def predict_proba(batch):
+        checked_out.append(test_engine.pool.checkedout())
+        return np.tile([0.1, 0.8, 0.1], (len(batch), 1))
+
+    model = mock_model()
+    model.engine.predict_proba.side_effect = predict_proba
+
+    with patch.object(predict.registry, "active", model):
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://test") as ac:
+            credentials = {"username": "predictor", "email": "predictor@example.com", "password": "password1"}
+            register = await ac.post("/api/auth/register", json=credentials)
+            headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+            single = await ac.post("/api/predict", json={"landmarks": [0.0] * 63}, headers=headers)
+            sequence = await ac.post("/api/predict/sequence", json={"landmarks": [[0.0] * 63] * 2},
+                                     headers=headers)
+
+    assert single.status_code == sequence.status_code == 200
+    assert checked_out == [0, 0]
+
+
+@pytest.mark.asyncio
+async def test_account_flow(app_sessions):
+    """
+    Registers, logs in, saves a prediction and changes the password, each request using one session.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        credentials = {"username": "signer", "email": "signer@example.com", "password": "password1"}
+        assert (await ac.post("/api/auth/register", json=credentials)).status_code == 200
+        login = await ac.post("/api/auth/login", data={"username": "signer", "password": "password1"})
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        app_sessions.clear()
+        saved = await ac.post("/api/account/add-prediction", json={"prediction_string": "HELLO"},
+                              headers=headers)
+        assert saved.status_code == 200
+        assert len(app_sessions) == 1
+
+        info = await ac.get("/api/account/info", headers=headers)
+        assert info.json()["prediction_history_size"] == 1
+
+        wrong = await ac.post("/api/account/change-password", headers=headers,
+                              json={"current_password": "wrong", "new_password": "password2"})
+        assert wrong.status_code == 401
+        changed = await ac.post("/api/account/change-password", headers=headers,
+                                json={"current_password": "password1", "new_password": "password2"})
+        assert changed.status_code == 200
+        login = await ac.post("/api/auth/login", data={"username": "signer", "password": "password2"})
+        assert login.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_prediction_history_pages(app_sessions):
+    """
+    Saves more predictions than fit on a page and follows the cursor through the whole history.
+    """
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        credentials = {"username": "pager", "email": "pager@example.com", "password": "password1"}
+        register = await ac.post("/api/auth/register", json=credentials)
+        headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+        for index in range(5):
+            await ac.post("/api/account/add-prediction", json={"prediction_string": f"WORD{index}"},
+                          headers=headers)
+
+        pages = []
+        params = {"limit": 2}
+        while True:
+            response = await ac.get("/api/account/get-predictions", params=params, headers=headers)
+            assert response.status_code == 200
+            pages.append([entry["content"] for entry in response.json()])
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+
+        invalid = await ac.get("/api/account/get-predictions", params={"cursor": "invalid"}, headers=headers)
+
+    assert pages == [["WORD4", "WORD3"], ["WORD2", "WORD1"], ["WORD0"]]
+    assert invalid.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_add_predictions_batch(app_sessions):
+    """
+    Saves a batch of predictions, retries it and expects every entry saved once, newest first.
+    """
+    from backend.routers.account import HISTORY_MAX_BATCH_SIZE
+
+    entries = [{"client_id": f"entry-{index}", "prediction_string": f"WORD{index}",
+                "created_at": f"2026-01-01T00:00:0{index}Z"} for index in range(3)]
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        credentials = {"username": "batcher", "email": "batcher@example.com", "password": "password1"}
+        register = await ac.post("/api/auth/register", json=credentials)
+        headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+
+        first = await ac.post("/api/account/add-predictions", json={"entries": entries + entries[:1]},
+                              headers=headers)
+        retry = await ac.post("/api/account/add-predictions", json={"entries": entries}, headers=headers)
+        future = await ac.post("/api/account/add-predictions", headers=headers, json={"entries": [
+            {"client_id": "future", "prediction_string": "LATER", "created_at": "2999-01-01T00:00:00Z"}]})
+        too_many = await ac.post("/api/account/add-predictions", headers=headers,
+                                 json={"entries": [{**entries[0], "client_id": str(index)}
+                                                   for index in range(HISTORY_MAX_BATCH_SIZE + 1)]})
+
+        history = await ac.get("/api/account/get-predictions", headers=headers)
+        info = await ac.get("/api/account/info", headers=headers)
+
+    assert (first.json()["added"], first.json()["skipped"]) == (3, 1)
+    assert (retry.json()["added"], retry.json()["skipped"]) == (0, 3)
+    assert future.status_code == too_many.status_code == 422
+    assert [entry["content"] for entry in history.json()] == ["WORD2", "WORD1", "WORD0"]
+    assert info.json()["prediction_history_size"] == 3
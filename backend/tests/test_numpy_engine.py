@@ -0,0 +1,106 @@
+"""
+Parity tests for the torch-free NumPy inference engine:
+    export_model.py: Tests BatchNorm folding against the unfolded layers.
+    numpy_model.py: Tests the exported weights against the TorchScript model.
+    engines.py: Tests backend and precision selection.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from backend.inference.engines import load_engine, torch_model_file
+from backend.inference.numpy_model import NumpyClassifier, gelu
+from backend.model.export_model import fold_batch_norm
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "model")
+
+# Evaluates the TorchScript model in a fresh interpreter, since conftest replaces torch with a mock.
+TORCHSCRIPT_REFERENCE = """
+import json, sys
+try:
+    import torch
+except ImportError:
+    sys.exit(3)
+model = torch.jit.load(sys.argv[1])
+model.eval()
+with torch.no_grad():
+    print(json.dumps(model(torch.tensor(json.load(sys.stdin))).tolist()))
+"""
+
+
+def test_fold_batch_norm_matches_unfolded_layers():
+    """
+    Ensures folding BatchNorm into Linear gives the same logits as applying both layers.
+    """
+    rng = np.random.default_rng(0)
+    sizes = [63, 16, 8, 5]
+    state_dict = {}
+    index = 0
+    for layer, (in_size, out_size) in enumerate(zip(sizes, sizes[1:])):
+        state_dict[f"model.{index}.weight"] = rng.normal(size=(out_size, in_size))
+        state_dict[f"model.{index}.bias"] = rng.normal(size=out_size)
+        if layer < len(sizes) - 2:
+            state_dict[f"model.{index + 1}.weight"] = rng.normal(size=out_size)
+            state_dict[f"model.{index + 1}.bias"] = rng.normal(size=out_size)
+            state_dict[f"model.{index + 1}.running_mean"] = rng.normal(size=out_size)
+            state_dict[f"model.{index + 1}.running_var"] = rng.uniform(0.5, 2.0, size=out_size)
+            state_dict[f"model.{index + 1}.num_batches_tracked"] = np.array(10)
+        index += 4
+
+    x = rng.uniform(-1, 1, size=(8, 63))
+
+    # Reference forward pass with separate Linear, BatchNorm and GELU layers.
+    expected = x
+    for layer in range(3):
+        base = layer * 4
+        expected = expected @ state_dict[f"model.{base}.weight"].T + state_dict[f"model.{base}.bias"]
+        if layer < 2:
+            bn = f"model.{base + 1}"
+            expected = ((expected - state_dict[f"{bn}.running_mean"])
+                        / np.sqrt(state_dict[f"{bn}.running_var"] + 1e-5)
+                        * state_dict[f"{bn}.weight"] + state_dict[f"{bn}.bias"])
+            expected = gelu(expected)
+
+    result = NumpyClassifier(fold_batch_norm(state_dict))(x.astype(np.float32))
+
+    np.testing.assert_allclose(result, expected, rtol=1e-4, atol=1e-4)
+
+
+def test_numpy_engine_matches_torchscript():
+    """
+    Ensures the exported weight file gives the same logits and predictions as the TorchScript model
+    at several batch sizes.
+    """
+    x = np.random.default_rng(0).uniform(-1, 1, size=(64, 63)).astype(np.float32)
+
+    reference = subprocess.run(
+        [sys.executable, "-c", TORCHSCRIPT_REFERENCE, os.path.join(MODEL_DIR, "landmark_model.pt")],
+        input=json.dumps(x.tolist()), capture_output=True, text=True
+    )
+    if reference.returncode == 3:
+        pytest.skip("torch is not installed")
+    assert reference.returncode == 0, reference.stderr
+    expected = np.array(json.loads(reference.stdout), dtype=np.float32)
+
+    model = NumpyClassifier.load(os.path.join(MODEL_DIR, "landmark_model.npz"))
+    for batch_size in (1, 8, 64):
+        result = model(x[:batch_size])
+        np.testing.assert_allclose(result, expected[:batch_size], rtol=1e-4, atol=1e-3)
+        np.testing.assert_array_equal(result.argmax(axis=1), expected[:batch_size].argmax(axis=1))
+
+
+def test_load_engine_precision_selection():
+    """
+    Ensures precision variants map to their exported file names and unsupported combinations are rejected.
+    """
+    assert torch_model_file("float32") == "landmark_model.pt"
+    assert torch_model_file("int8") == "landmark_model_int8.pt"
+
+    with pytest.raises(ValueError):
+        torch_model_file("float64")
+    with pytest.raises(ValueError):
+        load_engine("numpy", "int8")
@@ -0,0 +1,50 @@
+"""
+Unit tests for backend.utils.preprocessing.
+"""
+import numpy as np
+
+from backend.utils.preprocessing import normalize_landmarks, normalize_landmarks_batch
+
+
+def test_normalize_landmarks_batch_matches_per_row():
+    """
+    Ensures the vectorized normalization gives the same result as normalizing each row.
+    """
+    rows = np.random.default_rng(0).random((16, 63))
+    # A row with every landmark at the origin has a max distance of zero.
+    rows[3] = 0.5
+
+    expected = np.array([normalize_landmarks(row.copy()) for row in rows])
+    result = normalize_landmarks_batch(rows)
+
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_array_equal(result[3], np.zeros(63))
+
+
+def test_normalize_landmarks_batch_accepts_landmark_arrays():
+    """
+    Ensures (N, 21, 3) landmark arrays normalize the same as (N, 63) rows, and integer input is not truncated.
+    """
+    rows = np.random.default_rng(1).integers(0, 100, (8, 63))
+
+    result = normalize_landmarks_batch(rows.reshape(8, 21, 3))
+
+    assert result.shape == (8, 63)
+    assert result.dtype == np.float64
+    np.testing.assert_array_equal(result, normalize_landmarks_batch(rows.astype(np.float64)))
+
+
+def test_normalize_landmarks_batch_output_buffer():
+    """
+    Ensures results are written into the given buffer, including when it is the input itself.
+    """
+    rows = np.random.default_rng(2).random((4, 63)).astype(np.float32)
+    expected = normalize_landmarks_batch(rows)
+
+    out = np.empty((4, 63), dtype=np.float32)
+    result = normalize_landmarks_batch(rows, out=out)
+    assert np.shares_memory(result, out)
+    np.testing.assert_array_equal(out, expected)
+
+    normalize_landmarks_batch(rows, out=rows)
+    np.testing.assert_array_equal(rows, expected)
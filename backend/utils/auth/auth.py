@@ -2,7 +2,9 @@
 Utility functions for performing actions with authentication.
 """
 import bcrypt
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from ...configs.config import get_config
 from ...database.database import User
@@ -14,6 +16,7 @@ SECRET_REFRESH = get_config().get("AUTH", "secret_refresh")
 ALGORITHM = get_config().get("AUTH", "algorithm")
 TOKEN_ACCESS_EXPIRATION = int(get_config().get("AUTH", "access_token_expire_minutes"))
 TOKEN_REFRESH_EXPIRATION = int(get_config().get("AUTH", "refresh_token_expire_days"))
+ADMIN_TOKEN = get_config().get("AUTH", "admin_token")
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login", auto_error=False)
 
@@ -35,9 +38,11 @@ def verify_password(plain_password: str, hashed_password: bytes) -> bool:
     return bcrypt.checkpw(password_bytes, hashed_password)
 
 
-def update_password(email: str, new_password: str) -> User:
+async def update_password(session: AsyncSession, user: User, new_password: str) -> User:
     """
-    Update the password of the specified user.
+    Update the password of the specified user. Hashing runs in the thread pool, as bcrypt is
+    deliberately slow and would otherwise stall the event loop.
     """
-    user = database_update_password(email, get_password_hash(new_password))
+    password_hashed = await run_in_threadpool(get_password_hash, new_password)
+    user = await database_update_password(session, user, password_hashed)
     return user
@@ -1,18 +1,21 @@
+import secrets
 from datetime import datetime, timezone, timedelta
 from typing import Optional
 
 import jwt
-from fastapi import Response, Request, HTTPException, status
+from fastapi import Response, HTTPException, status
+from fastapi.requests import HTTPConnection
 from jwt import InvalidTokenError
 
 from backend.models.auth_models import TokenData
 from backend.utils.auth.auth import ALGORITHM, SECRET_ACCESS, TOKEN_ACCESS_EXPIRATION, \
-    TOKEN_REFRESH_EXPIRATION, SECRET_REFRESH
+    TOKEN_REFRESH_EXPIRATION, SECRET_REFRESH, ADMIN_TOKEN
 
 
-def get_current_token(request: Request) -> Optional[str]:
+def get_current_token(request: HTTPConnection) -> Optional[str]:
     """
-    Get the current token from the oauth2 header format.
+    Get the current token from the oauth2 header format. Works for both HTTP requests
+    and websocket connections.
     """
     # Attempt to get the authorization header
     token = None
@@ -28,6 +31,18 @@ def get_current_token(request: Request) -> Optional[str]:
     return token
 
 
+def verify_admin_token(request: HTTPConnection):
+    """
+    Require the admin token from config in the X-Admin-Token header, for operational routes.
+    """
+    token = request.headers.get("X-Admin-Token", "")
+    if not secrets.compare_digest(token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid admin token"
+        )
+
+
 def get_token_data(token: str, token_type: str) -> TokenData:
     """
     Extract token data from JWT.
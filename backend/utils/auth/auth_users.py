@@ -1,41 +1,44 @@
 import re
 from typing import Optional, Annotated
 
-from fastapi import Depends, status, HTTPException
+from fastapi import Depends, status, HTTPException, WebSocket, WebSocketException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from backend.database.database import User
+from backend.database.database import User, engine, get_session
 from backend.database.user_queries import database_create_user, get_user_email, get_user_username, \
     database_update_login_time
 from backend.utils.auth.auth import get_password_hash, verify_password
 from backend.utils.auth.auth_tokens import get_current_token, get_token_data
 
 
-def check_user_exists(username):
+async def check_user_exists(session: AsyncSession, username):
     """
     Check if a user exists based on username.
     """
-    if get_user_username(username):
+    if await get_user_username(session, username):
         return True
     return False
 
 
-def check_user_email_exists(email):
+async def check_user_email_exists(session: AsyncSession, email):
     """
     Check if a user exists based on email.
     """
-    if get_user_email(email):
+    if await get_user_email(session, email):
         return True
     return False
 
 
-def create_user(username: str, email: str, password: str):
+async def create_user(session: AsyncSession, username: str, email: str, password: str):
     """
-    Create a new user.
+    Create a new user. The password is hashed in the thread pool so bcrypt does not stall the event loop.
     """
-    database_create_user(username, email, get_password_hash(password))
+    password_hashed = await run_in_threadpool(get_password_hash, password)
+    await database_create_user(session, username, email, password_hashed)
 
 
-def get_user(identifier: str) -> Optional[User]:
+async def get_user(session: AsyncSession, identifier: str) -> Optional[User]:
     """
     Get a user based on identifier. Can be username or email.
     """
@@ -43,27 +46,32 @@ def get_user(identifier: str) -> Optional[User]:
     email_regex = r"^\S+@\S+\.\S+$"
 
     if re.match(email_regex, identifier):
-        return get_user_email(identifier)
-    return get_user_username(identifier)
+        return await get_user_email(session, identifier)
+    return await get_user_username(session, identifier)
 
 
-def get_authenticated_user(identifier: str, password: str) -> Optional[User]:
+async def get_authenticated_user(session: AsyncSession, identifier: str, password: str) -> Optional[User]:
     """
-    Get a user and authenticate them with provided password.
+    Get a user and authenticate them with provided password. The password is checked in the
+    thread pool so bcrypt does not stall the event loop.
     """
-    user = get_user(identifier)
+    user = await get_user(session, identifier)
     if not user:
         return None
-    if not verify_password(password, user.password_hashed.encode("utf-8")):
+    if not await run_in_threadpool(verify_password, password, user.password_hashed.encode("utf-8")):
         return None
-    database_update_login_time(user.email)
+    await database_update_login_time(session, user)
     return user
 
 
-def _get_user_from_request(token: Optional[str] = Depends(get_current_token)) -> Optional[User]:
+async def _get_user_from_request(token: Optional[str] = Depends(get_current_token),
+                                 session: AsyncSession = Depends(get_session)) -> Optional[User]:
     """
     Core function for getting an access token, validating it, and returning
-    a user.
+    a user. The user is loaded in the request's session, so routes can use it directly.
+    The read transaction is ended once the user is loaded, returning the connection to the
+    pool, so routes like /predict do not hold one while waiting for inference. Objects are not
+    expired on commit, and routes that use the database again get a new connection.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,7 +84,8 @@ def _get_user_from_request(token: Optional[str] = Depends(get_current_token)) ->
 
     # Extract data from the token and get the user from the data.
     token_data = get_token_data(token, "access")
-    user = get_user_username(token_data.username)
+    user = await get_user_username(session, token_data.username)
+    await session.commit()
 
     if user is None:
         raise credentials_exception
@@ -84,7 +93,7 @@ def _get_user_from_request(token: Optional[str] = Depends(get_current_token)) ->
     return user
 
 
-def get_current_user(current_user: User = Depends(_get_user_from_request)) -> User:
+async def get_current_user(current_user: User = Depends(_get_user_from_request)) -> User:
     """
     Get the current user from the oauth2 header.
     """
@@ -96,14 +105,28 @@ def get_current_user(current_user: User = Depends(_get_user_from_request)) -> Us
     return current_user
 
 
-def get_current_user_optional(current_user: User = Depends(_get_user_from_request)) -> Optional[User]:
+async def get_current_user_optional(current_user: User = Depends(_get_user_from_request)) -> Optional[User]:
     """
     Optionally get the current user if the request has authorization data.
     """
     return current_user
 
 
-def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)]) -> User:
+async def get_websocket_user(websocket: WebSocket) -> Optional[User]:
+    """
+    Optionally get the user for a websocket connection when it is opened. Browsers cannot set
+    headers on websocket requests, so the access token may also be passed as a token query parameter.
+    The session is closed once the user is loaded, rather than held for the whole connection.
+    """
+    token = websocket.query_params.get("token") or get_current_token(websocket)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            return await _get_user_from_request(token, session)
+    except HTTPException as exc:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=exc.detail)
+
+
+async def get_current_active_user(current_user: Annotated[User, Depends(get_current_user)]) -> User:
     """
     Get the current user from the auth2 header and confirm they are marked as active.
     """
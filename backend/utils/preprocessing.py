@@ -14,3 +14,35 @@ def normalize_landmarks(landmark_row):
         landmarks /= max_dist
 
     return landmarks.flatten()
+
+
+def normalize_landmarks_batch(landmark_rows, out=None):
+    """
+    Normalize a batch of landmark rows in whole-array operations. Accepts an (N, 63) array
+    or an (N, 21, 3) array of landmarks and returns an (N, 63) array. Gives the same result
+    as calling normalize_landmarks on each row, without modifying the input unless it is also
+    passed as out. Rows whose landmarks all sit at the origin are left as zeros.
+
+    An (N, 63) or (N, 21, 3) float array can be passed as out to write the result into,
+    avoiding allocation when normalizing into a preallocated buffer.
+    """
+    rows = np.asarray(landmark_rows)
+    if rows.ndim not in (2, 3) or rows.shape[-1] % 3 or (rows.ndim == 3 and rows.shape[-1] != 3):
+        raise ValueError(f"Expected an (N, 63) or (N, 21, 3) landmark array, got shape {rows.shape}")
+    count = len(rows)
+    landmarks = rows.reshape(count, rows.shape[1] // 3 if rows.ndim == 2 else rows.shape[1], 3)
+
+    if out is None:
+        out = np.empty(landmarks.shape, dtype=np.result_type(rows.dtype, np.float32))
+    elif out.size != landmarks.size or len(out) != count or not out.flags.c_contiguous:
+        raise ValueError(f"Output buffer of shape {out.shape} does not match landmarks of shape {rows.shape} "
+                         f"or is not contiguous")
+    result = out.reshape(landmarks.shape)
+
+    # Overlapping input and output are buffered by NumPy, so the origin is read before being zeroed.
+    np.subtract(landmarks, landmarks[:, :1, :], out=result)
+
+    max_dist = np.max(np.abs(result), axis=(1, 2), keepdims=True)
+    np.divide(result, max_dist, out=result, where=max_dist > 0)
+
+    return result.reshape(count, -1)
@@ -0,0 +1,27 @@
+"""
+Read the memory use of a process from /proc, to compare how much memory forked workers share.
+"""
+
+
+def process_memory(pid: int | str = "self") -> dict[str, int] | None:
+    """
+    Get the resident (rss), proportional (pss), shared and private memory of a process in bytes.
+    Pages shared between processes are split evenly between them in pss, so the sum of pss over
+    all workers is the memory they actually use. Returns None where /proc is not available.
+    """
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as smaps:
+            fields = {}
+            for line in smaps:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except OSError:
+        return None
+
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "shared": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
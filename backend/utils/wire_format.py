@@ -0,0 +1,34 @@
+"""
+Decoding for the compact binary landmark wire format. A payload is a sequence of frames,
+each made up of raw little-endian float32 values with no header or separators.
+"""
+import numpy as np
+
+# Content type selecting the binary format on prediction requests.
+LANDMARK_CONTENT_TYPE = "application/octet-stream"
+
+FLOAT32_LE = np.dtype("<f4")
+
+
+class WireFormatError(ValueError):
+    """
+    Raised when a binary landmark payload does not hold whole, finite frames.
+    """
+
+
+def decode_landmark_frames(payload: bytes, features: int, max_frames: int | None = None) -> np.ndarray:
+    """
+    Decode a binary payload into an (N, features) float32 array without copying.
+    The returned array is read only and shares memory with the payload.
+    """
+    frame_bytes = features * FLOAT32_LE.itemsize
+    if len(payload) == 0 or len(payload) % frame_bytes != 0:
+        raise WireFormatError(f"Expected a multiple of {frame_bytes} bytes, received {len(payload)}")
+
+    frames = np.frombuffer(payload, dtype=FLOAT32_LE).reshape(-1, features)
+    if max_frames is not None and len(frames) > max_frames:
+        raise WireFormatError(f"Expected at most {max_frames} frames, received {len(frames)}")
+    if not np.isfinite(frames).all():
+        raise WireFormatError("Landmark values must be finite")
+
+    return frames